@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from flask import Flask
 from flask import session
 from flask_sqlalchemy import SQLAlchemy
@@ -16,33 +18,27 @@ def create_app(config_object=None):
     db.init_app(app)
 
     with app.app_context():
-        try:
-            from app.models.manga import Manga
-            uri = app.config.get("SQLALCHEMY_DATABASE_URI", "")
-            if uri.startswith("sqlite"):
-                rows = db.session.execute("PRAGMA table_info('user')").fetchall()
-                cols = {r[1] for r in rows}
-                if "password_hash" not in cols:
-                    db.session.execute("ALTER TABLE user ADD COLUMN password_hash VARCHAR(256)")
-                if "is_admin" not in cols:
-                    db.session.execute("ALTER TABLE user ADD COLUMN is_admin BOOLEAN DEFAULT 0")
-                
-                # Manga slug migration
-                m_rows = db.session.execute("PRAGMA table_info('manga')").fetchall()
-                m_cols = {r[1] for r in m_rows}
-                if "slug" not in m_cols:
-                    db.session.execute("ALTER TABLE manga ADD COLUMN slug VARCHAR(255)")
-                    db.session.commit()
-                    # Populate slugs for existing mangas
-                    mangas = Manga.query.all()
-                    for m in mangas:
-                        if not m.slug:
-                            m.slug = Manga.slugify(m.title)
+        from app.models.manga import Manga  # noqa: F401
+        from app.models.chapter import Chapter  # noqa: F401
+        from app.models.page import Page  # noqa: F401
+        from app.models.reading_progress import ReadingProgress  # noqa: F401
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI", "")
+        if uri.startswith("sqlite"):
+            # Each step commits on its own: one failing must not skip the rest.
+            for step in MIGRATION_STEPS:
+                try:
+                    step()
                     db.session.commit()
-                
-                db.session.commit()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Database migration step %s failed", step.__name__)
+
+        try:
+            # Registers the Manga model events and creates/fills the FTS table.
+            from app.services.manga_search import ensure_search_index
+            ensure_search_index()
         except Exception:
-            pass
+            db.session.rollback()
 
     from app.blueprints.manga import manga_bp
     from app.blueprints.user_content import user_content_bp
@@ -60,6 +56,9 @@ def create_app(config_object=None):
     app.register_blueprint(storage_bp)
     app.register_blueprint(auth_bp)
 
+    from app.services.thumbnails import thumb_url, thumb_srcset
+    app.jinja_env.globals.update(thumb_url=thumb_url, thumb_srcset=thumb_srcset)
+
     @app.context_processor
     def inject_current_user():
         try:
@@ -73,3 +72,109 @@ def create_app(config_object=None):
             return {"current_user": None, "is_authenticated": False}
 
     return app
+
+
+def _table_columns(table):
+    rows = db.session.execute(db.text(f"PRAGMA table_info('{table}')")).fetchall()
+    return {r[1] for r in rows}
+
+
+def _migrate_user_columns():
+    cols = _table_columns("user")
+    if cols and "password_hash" not in cols:
+        db.session.execute(db.text("ALTER TABLE user ADD COLUMN password_hash VARCHAR(256)"))
+    if cols and "is_admin" not in cols:
+        db.session.execute(db.text("ALTER TABLE user ADD COLUMN is_admin BOOLEAN DEFAULT 0"))
+
+
+# Every column added to manga after the first release. All of them go in
+# before any ORM query, since the mapped model selects every one.
+MANGA_COLUMNS = {
+    "slug": "VARCHAR(255)",
+    "cover_path": "VARCHAR(512)",
+    "chapter_count": "INTEGER NOT NULL DEFAULT 0",
+    "page_count": "INTEGER NOT NULL DEFAULT 0",
+    "latest_chapter_number": "INTEGER",
+    "updated_at": "DATETIME",
+}
+
+
+def _migrate_manga_columns():
+    cols = _table_columns("manga")
+    if not cols:
+        return
+    for col, ddl in MANGA_COLUMNS.items():
+        if col not in cols:
+            db.session.execute(db.text(f"ALTER TABLE manga ADD COLUMN {col} {ddl}"))
+
+
+def _backfill_manga_rows():
+    from app.models.manga import Manga
+    if not _table_columns("manga"):
+        return
+    for m in Manga.query.filter(Manga.slug.is_(None)).all():
+        m.slug = Manga.slugify(m.title)
+    now = datetime.utcnow()
+    for m in Manga.query.filter(Manga.updated_at.is_(None)).all():
+        m.updated_at = now
+
+
+def _backfill_manga_counters():
+    # Runs until the counters are filled, not only when the columns are new:
+    # an upgrade interrupted after the ALTER must still get its covers.
+    from app.models.manga import Manga
+    from app.repositories.manga_repository import MangaRepository
+    if not _table_columns("manga") or not _table_columns("chapter"):
+        return
+    unfilled = Manga.query.filter(
+        Manga.chapter_count == 0,
+        db.text("EXISTS (SELECT 1 FROM chapter WHERE chapter.manga_id = manga.id)"),
+    ).all()
+    repo = MangaRepository()
+    for m in unfilled:
+        repo.refresh_counters(m)
+
+
+def _create_indexes():
+    from app.models.manga import Manga
+    from app.models.chapter import Chapter
+    for model in (Manga, Chapter):
+        if _table_columns(model.__tablename__):
+            for index in model.__table__.indexes:
+                index.create(bind=db.engine, checkfirst=True)
+
+
+def _migrate_reading_progress():
+    from app.models.reading_progress import ReadingProgress
+    cols = _table_columns("reading_progress")
+    if not cols:
+        return
+    # Left NULL on existing rows; any timestamped update replaces them.
+    for col in ("updated_at", "chapter_opened_at"):
+        if col not in cols:
+            db.session.execute(db.text(f"ALTER TABLE reading_progress ADD COLUMN {col} DATETIME"))
+    unique_index = db.session.execute(
+        db.text("SELECT name FROM sqlite_master WHERE type = 'index' AND name = 'uq_reading_progress_user_manga'")
+    ).fetchone()
+    if unique_index is None:
+        # Once, before the unique index exists: of each (user, manga)
+        # duplicate set keep the row with the highest id, which is
+        # the last one inserted, not necessarily the last one updated.
+        db.session.execute(db.text(
+            "DELETE FROM reading_progress WHERE id NOT IN "
+            "(SELECT MAX(id) FROM reading_progress GROUP BY user_id, manga_id)"
+        ))
+        db.session.commit()
+    for index in ReadingProgress.__table__.indexes:
+        index.create(bind=db.engine, checkfirst=True)
+
+
+# Ad-hoc SQLite migrations, in order; all of them are safe to rerun.
+MIGRATION_STEPS = (
+    _migrate_user_columns,
+    _migrate_manga_columns,
+    _backfill_manga_rows,
+    _backfill_manga_counters,
+    _create_indexes,
+    _migrate_reading_progress,
+)
@@ -1,109 +1,152 @@
-from flask import render_template, abort, session, request
-from app.models.manga import Manga
-
+from flask import render_template, abort, session, request, jsonify, url_for, make_response
 from app.blueprints.manga import manga_bp
 from app.services.manga_service import MangaService
 from app.services.chapter_service import ChapterService
 from app.services.reading_progress_service import ReadingProgressService
+from app.services.response_cache import cached_for_anonymous
+from app.services import etags
 from app.models.comment import Comment
 from app.models.favorite import Favorite
 from app.models.to_read import ToRead
-from app.repositories.page_repository import PageRepository
 
 
 manga_service = MangaService()
 chapter_service = ChapterService()
 reading_progress_service = ReadingProgressService()
-page_repository = PageRepository()
+
+
+def _catalog_page():
+    return manga_service.list_manga_page(
+        sort=request.args.get("sort", "title"),
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+        limit=request.args.get("limit", type=int),
+    )
+
+
+def _page_url(endpoint, page, direction, **extra):
+    cursor = page[f"{direction}_cursor"]
+    if not cursor:
+        return None
+    key = "after" if direction == "next" else "before"
+    return url_for(endpoint, sort=page["sort"], limit=page["limit"], **{key: cursor}, **extra)
 
 
 @manga_bp.route("/")
+@cached_for_anonymous
 def manga_list():
     query = request.args.get('q', '').strip()
+    page = None
     if query:
-        manga_items = Manga.query.filter(Manga.title.ilike(f'%{query}%')).all()
+        manga_items = manga_service.search(query)
+        total = len(manga_items)
     else:
-        manga_items = manga_service.list_manga()
+        page = _catalog_page()
+        manga_items = page["items"]
+        total = manga_service.count_manga()
+        page["next_url"] = _page_url("manga.manga_list", page, "next")
+        page["prev_url"] = _page_url("manga.manga_list", page, "prev")
         
-    display = []
-    for m in manga_items:
-        cover = None
-        chs = chapter_service.list_chapters_for_manga(m.id)
-        if chs:
-            # Sort chapters to get the first one for the cover
-            chs.sort(key=lambda x: x.number)
-            pages = page_repository.get_for_chapter(chs[0].id)
-            if pages:
-                cover = pages[0].image_path
-        display.append({"manga": m, "cover": cover})
-    return render_template("manga/list.html", display_manga=display, query=query)
+    display = [{"manga": m, "cover": m.cover_path} for m in manga_items]
+    return render_template("manga/list.html", display_manga=display, query=query, page=page, total=total)
+
+
+@manga_bp.route("/api/manga")
+def manga_list_json():
+    page = _catalog_page()
+    return jsonify({
+        "items": [
+            {
+                "id": m.id,
+                "title": m.title,
+                "slug": m.slug,
+                "url": url_for("manga.manga_detail", slug=m.slug),
+                "cover": m.cover_path,
+                "chapter_count": m.chapter_count,
+                "page_count": m.page_count,
+                "latest_chapter_number": m.latest_chapter_number,
+                "updated_at": m.updated_at.isoformat() if m.updated_at else None,
+            }
+            for m in page["items"]
+        ],
+        "sort": page["sort"],
+        "limit": page["limit"],
+        "next_cursor": page["next_cursor"],
+        "prev_cursor": page["prev_cursor"],
+        "next_url": _page_url("manga.manga_list_json", page, "next"),
+        "prev_url": _page_url("manga.manga_list_json", page, "prev"),
+    })
+
+
+@manga_bp.route("/search/suggest")
+def search_suggest():
+    query = request.args.get("q", "").strip()
+    limit = max(1, min(request.args.get("limit", 8, type=int), 20))
+    suggestions = manga_service.suggest(query, limit=limit) if len(query) >= 2 else []
+    return jsonify([
+        {"title": s["title"], "slug": s["slug"], "url": url_for("manga.manga_detail", slug=s["slug"])}
+        for s in suggestions
+        if s["slug"]
+    ])
 
 
 @manga_bp.route("/<string:slug>/")
+@cached_for_anonymous
 def manga_detail(slug):
-    manga, chapters = manga_service.get_manga_with_chapters_by_slug(slug)
+    manga = manga_service.get_manga_by_slug(slug)
     if not manga:
         abort(404)
-    last_read_chapter = None
-    user_id = session.get("user_id")
-    comments = Comment.query.filter_by(manga_id=manga.id, chapter_id=None).order_by(Comment.created_at.asc()).all()
+    progress = None
     is_favorite = False
     is_to_read = False
+    user_id = session.get("user_id")
     if user_id is not None:
         progress = reading_progress_service.get_last_read_chapter(user_id, manga.id)
-        if progress:
-            last_read_chapter = ChapterService().chapter_repository.get_by_id(progress.chapter_id)
         is_favorite = Favorite.query.filter_by(user_id=user_id, manga_id=manga.id).first() is not None
         is_to_read = ToRead.query.filter_by(user_id=user_id, manga_id=manga.id).first() is not None
-    return render_template("manga/detail.html", manga=manga, chapters=chapters, last_read_chapter=last_read_chapter, comments=comments, is_favorite=is_favorite, is_to_read=is_to_read)
+    etag = etags.manga_detail_etag(
+        manga,
+        user_id,
+        (
+            progress.chapter_id if progress else None,
+            progress.last_page_number if progress else None,
+            is_favorite,
+            is_to_read,
+        ),
+    )
+    cached = etags.not_modified(etag)
+    if cached is not None:
+        return cached
+    chapters = chapter_service.list_chapters_for_manga(manga.id)
+    last_read_chapter = None
+    resume_page = None
+    if progress:
+        last_read_chapter = chapter_service.chapter_repository.get_by_id(progress.chapter_id)
+        resume_page = progress.last_page_number if last_read_chapter else None
+    comments = Comment.query.filter_by(manga_id=manga.id, chapter_id=None).order_by(Comment.created_at.asc()).all()
+    response = make_response(render_template("manga/detail.html", manga=manga, chapters=chapters, last_read_chapter=last_read_chapter, resume_page=resume_page, comments=comments, is_favorite=is_favorite, is_to_read=is_to_read))
+    return etags.finish(response, etag)
 
 # url adlandırma için
 @manga_bp.route("/<string:slug>/bolum-<int:chapter_id>/")
+@cached_for_anonymous
 def chapter_read(slug, chapter_id):
     manga = manga_service.get_manga_by_slug(slug)
     if not manga:
         abort(404)
-    chapter, pages = chapter_service.get_chapter_with_pages(chapter_id)
+    chapter = chapter_service.chapter_repository.get_by_id(chapter_id)
     if not chapter or chapter.manga_id != manga.id:
         abort(404)
-    
-    # Calculate prev/next chapters
-    all_chapters = chapter_service.list_chapters_for_manga(manga.id)
-    # Chapters are usually sorted by number desc or asc. Assuming default sort (number asc hopefully)
-    # If list_chapters_for_manga returns sorted, we can find index.
-    # Note: If service returns DESC, then next in list is previous chapter.
-    # Let's check service or assume and fix. Usually chapters are listed 1..N.
-    # Actually, often they are listed newest first (DESC).
-    # Let's check logic: if I am at ch 1, next is 2.
-    
-    prev_chapter = None
-    next_chapter = None
-    
-    for i, ch in enumerate(all_chapters):
-        if ch.id == chapter_id:
-            # If sorted 1, 2, 3...
-            # Prev is i-1, Next is i+1
-            # But if sorted 3, 2, 1... (Newest first)
-            # Prev (older) is i+1, Next (newer) is i-1
-            # Let's assume list_chapters_for_manga returns by number ASC for now, or check service.
-            # Standard for reading lists is usually ASC so you read in order.
-            # But often blogs list DESC.
-            # Let's safely check numbers.
-            pass
-            
-    # Better approach: Sort by number
-    all_chapters.sort(key=lambda x: x.number)
-    
-    for i, ch in enumerate(all_chapters):
-        if ch.id == chapter_id:
-            if i > 0:
-                prev_chapter = all_chapters[i-1]
-            if i < len(all_chapters) - 1:
-                next_chapter = all_chapters[i+1]
-            break
-
     user_id = session.get("user_id")
     if user_id is not None:
+        # Recorded even when the page itself is answered with a 304.
         reading_progress_service.set_last_read_chapter(user_id, manga.id, chapter.id)
+    etag = etags.chapter_read_etag(manga, chapter, user_id)
+    cached = etags.not_modified(etag)
+    if cached is not None:
+        return cached
+    pages = chapter_service.page_repository.get_for_chapter(chapter.id)
+    prev_chapter, next_chapter = chapter_service.get_neighbors(chapter)
     chapter_comments = Comment.query.filter_by(manga_id=manga.id, chapter_id=chapter_id).order_by(Comment.created_at.asc()).all()
-    return render_template("manga/read.html", manga=manga, chapter=chapter, pages=pages, comments=chapter_comments, next_chapter=next_chapter, prev_chapter=prev_chapter)
+    response = make_response(render_template("manga/read.html", manga=manga, chapter=chapter, pages=pages, comments=chapter_comments, next_chapter=next_chapter, prev_chapter=prev_chapter))
+    return etags.finish(response, etag)
@@ -1,11 +1,11 @@
 from flask import render_template, jsonify, current_app, session, redirect, url_for, request, abort
 from app.blueprints.status import status_bp
-from app.models.manga import Manga
-from app.models.chapter import Chapter
-from app.models.page import Page
 from app.models.user import User
+from app.repositories.manga_repository import MangaRepository
 from app.services.storage_health import storage_health
 from app.services.run_history import get_runs_status
+from app.services.response_cache import cache_stats
+from app.services.progress_buffer import get_progress_buffer
 import shutil
 import os
 
@@ -46,9 +46,10 @@ def status_data():
         return jsonify({"error": "forbidden"}), 403
     # DB Stats
     try:
-        manga_count = Manga.query.count()
-        chapter_count = Chapter.query.count()
-        page_count = Page.query.count()
+        totals = MangaRepository().library_totals()
+        manga_count = totals["mangas"]
+        chapter_count = totals["chapters"]
+        page_count = totals["pages"]
     except Exception as e:
         return jsonify({"error": f"DB Error: {str(e)}"}), 500
 
@@ -86,5 +87,7 @@ def status_data():
             "pages": page_count
         },
         "storage_health": health_data,
-        "disk_usage": disk_usage
+        "disk_usage": disk_usage,
+        "response_cache": cache_stats(),
+        "progress_buffer": get_progress_buffer().stats()
     })
@@ -1,10 +1,92 @@
-from flask import current_app, send_from_directory, abort
+from flask import current_app, send_from_directory, send_file, abort, request
 from app.blueprints.storage import storage_bp
+from app.services.image_variants import is_negotiable, pick_variant
+from app.services.thumbnails import THUMB_WIDTHS, get_thumbnail
+from werkzeug.security import safe_join
+from urllib.parse import quote
+import mimetypes
 import os
+import zlib
+
+
+def _file_etag(full_path: str, st: os.stat_result) -> str:
+    # Same shape as werkzeug's send_file ETag, so switching modes keeps tags valid.
+    checksum = zlib.adler32(full_path.encode("utf-8")) & 0xFFFFFFFF
+    return f"{st.st_mtime}-{st.st_size}-{checksum}"
+
+
+def _offload(base_path: str, relpath: str, mode: str, mimetype=None):
+    full_path = safe_join(base_path, relpath)
+    if full_path is None or not os.path.isfile(full_path):
+        abort(404)
+    st = os.stat(full_path)
+    mimetype = mimetype or mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+    response = current_app.response_class(mimetype=mimetype)
+    if mode == "x-accel":
+        prefix = current_app.config.get("STORAGE_ACCEL_PREFIX", "/_storage/manga/").rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{quote(relpath)}"
+    else:
+        response.headers["X-Sendfile"] = os.path.abspath(full_path)
+    response.set_etag(_file_etag(full_path, st))
+    response.last_modified = st.st_mtime
+    return response.make_conditional(request)
+
+
+def _immutable(response):
+    max_age = current_app.config.get("STORAGE_MAX_AGE", 0)
+    if max_age:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+    return response
+
+
+def _send(base_path: str, relpath: str, mimetype=None, immutable: bool = False):
+    mode = (current_app.config.get("STORAGE_OFFLOAD") or "none").lower()
+    max_age = current_app.config.get("STORAGE_MAX_AGE", 0) if immutable else None
+    if mode in ("x-accel", "x-sendfile"):
+        response = _offload(base_path, relpath, mode, mimetype=mimetype)
+    else:
+        response = send_from_directory(base_path, relpath, mimetype=mimetype, max_age=max_age)
+    return _immutable(response) if immutable else response
+
 
 @storage_bp.route("/storage/manga/<path:relpath>")
 def serve_manga(relpath: str):
     base_path = current_app.config.get("STORAGE_MANGA_PATH")
     if not base_path or not os.path.exists(base_path):
         abort(404)
-    return send_from_directory(base_path, relpath)
+    if not is_negotiable(relpath):
+        return _send(base_path, relpath)
+    original = safe_join(base_path, relpath)
+    if original is None or not os.path.isfile(original):
+        abort(404)
+    variant = pick_variant(base_path, relpath, request.accept_mimetypes)
+    if variant is not None:
+        response = _send(base_path, variant[0], mimetype=variant[1], immutable=True)
+    else:
+        response = _send(base_path, relpath, immutable=True)
+    # The same URL can answer with different bytes depending on Accept.
+    response.vary.add("Accept")
+    return response
+
+
+@storage_bp.route("/storage/thumbs/<int:width>/<path:relpath>")
+def serve_thumbnail(width: int, relpath: str):
+    base_path = current_app.config.get("STORAGE_MANGA_PATH")
+    if not base_path or width not in THUMB_WIDTHS or not is_negotiable(relpath):
+        abort(404)
+    original = safe_join(base_path, relpath)
+    if original is None or not os.path.isfile(original):
+        abort(404)
+    try:
+        thumbnail = get_thumbnail(original, width)
+    except Exception:
+        thumbnail = None
+    if thumbnail is None:
+        # No Pillow or an undecodable image: the full-size cover still works.
+        return _send(base_path, relpath, immutable=True)
+    # Hits refresh the file's mtime for LRU eviction, so tag it by its cache key instead.
+    key = os.path.splitext(os.path.basename(thumbnail))[0]
+    response = send_file(thumbnail, mimetype="image/webp", etag=key, last_modified=os.path.getmtime(original), max_age=current_app.config.get("STORAGE_MAX_AGE"))
+    return _immutable(response)
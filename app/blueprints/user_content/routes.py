@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from flask import request, jsonify, redirect, url_for, session, render_template
 from app.blueprints.user_content import user_content_bp
 from app import db
@@ -8,6 +10,9 @@ from app.models.manga import Manga
 from app.models.chapter import Chapter
 from app.models.user import User
 from app.models.manga import Manga
+from app.repositories.manga_repository import MangaRepository
+from app.services.response_cache import bump_generation
+from app.services.reading_progress_service import ReadingProgressService
 
 
 def _require_user():
@@ -52,6 +57,7 @@ def add_comment(manga_id):
     c = Comment(user_id=user_id, manga_id=manga_id, chapter_id=(ch_obj.id if ch_obj else None), content=content)
     db.session.add(c)
     db.session.commit()
+    bump_generation()
     if request.is_json:
         return jsonify({"status": "ok", "comment_id": c.id}), 201
     target = url_for("manga.manga_detail", slug=manga.slug)
@@ -76,6 +82,7 @@ def update_comment(comment_id):
         return jsonify({"error": "forbidden"}), 403
     c.content = content
     db.session.commit()
+    bump_generation()
     return jsonify({"status": "ok"}), 200
 
 
@@ -96,9 +103,59 @@ def delete_comment(comment_id):
         
     db.session.delete(c)
     db.session.commit()
+    bump_generation()
     return jsonify({"status": "ok"}), 200
 
 
+@user_content_bp.route("/progress", methods=["POST"])
+def save_progress():
+    # Fed by navigator.sendBeacon from the reader; updates land in the
+    # progress write-behind buffer, so frequent beacons cost no DB writes.
+    user_id = _require_user()
+    if not user_id:
+        return jsonify({"error": "login_required"}), 401
+    data = request.get_json(silent=True) or request.form
+    try:
+        chapter_id = int(data.get("chapter_id"))
+        page_number = int(data.get("page"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_progress"}), 400
+    if page_number < 1:
+        return jsonify({"error": "invalid_progress"}), 400
+    try:
+        # From /progress/open for this page load; lets a late beacon from a
+        # chapter the reader already left be ignored.
+        opened_at = datetime.fromisoformat(data.get("opened_at"))
+    except (TypeError, ValueError):
+        opened_at = None
+    if opened_at is not None and opened_at.tzinfo is not None:
+        opened_at = None  # the reader sends naive UTC, like the stored timestamps
+    manga_id = db.session.query(Chapter.manga_id).filter(Chapter.id == chapter_id).scalar()
+    if manga_id is None:
+        return jsonify({"error": "chapter_not_found"}), 404
+    ReadingProgressService().set_last_read_page(user_id, manga_id, chapter_id, page_number, opened_at=opened_at)
+    return "", 204
+
+
+@user_content_bp.route("/progress/open", methods=["POST"])
+def open_chapter():
+    # Called by the reader on every pageshow, bfcache restores included, so
+    # the open time its beacons carry is never one replayed from cached HTML.
+    user_id = _require_user()
+    if not user_id:
+        return jsonify({"error": "login_required"}), 401
+    data = request.get_json(silent=True) or request.form
+    try:
+        chapter_id = int(data.get("chapter_id"))
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid_progress"}), 400
+    manga_id = db.session.query(Chapter.manga_id).filter(Chapter.id == chapter_id).scalar()
+    if manga_id is None:
+        return jsonify({"error": "chapter_not_found"}), 404
+    opened_at = ReadingProgressService().set_last_read_chapter(user_id, manga_id, chapter_id)
+    return jsonify({"opened_at": opened_at.isoformat()})
+
+
 @user_content_bp.route("/manga/<int:manga_id>/favorite", methods=["POST"])
 def toggle_favorite(manga_id):
     user_id = _require_user()
@@ -154,31 +211,9 @@ def profile():
     favorites = Favorite.query.filter_by(user_id=user_id).all()
     to_read_items = ToRead.query.filter_by(user_id=user_id).all()
     
-    fav_manga = []
-    tr_manga = []
-    
-    for f in favorites:
-        m = Manga.query.get(f.manga_id)
-        if m:
-            cover = None
-            chs = Chapter.query.filter_by(manga_id=m.id).order_by(Chapter.number.asc()).all()
-            if chs:
-                from app.repositories.page_repository import PageRepository
-                pages = PageRepository().get_for_chapter(chs[0].id)
-                if pages:
-                    cover = pages[0].image_path
-            fav_manga.append({"manga": m, "cover": cover})
-            
-    for t in to_read_items:
-        m = Manga.query.get(t.manga_id)
-        if m:
-            cover = None
-            chs = Chapter.query.filter_by(manga_id=m.id).order_by(Chapter.number.asc()).all()
-            if chs:
-                from app.repositories.page_repository import PageRepository
-                pages = PageRepository().get_for_chapter(chs[0].id)
-                if pages:
-                    cover = pages[0].image_path
-            tr_manga.append({"manga": m, "cover": cover})
+    # One query for every listed manga; covers come from the denormalized column.
+    by_id = {m.id: m for m in MangaRepository().get_by_ids({f.manga_id for f in favorites} | {t.manga_id for t in to_read_items})}
+    fav_manga = [{"manga": by_id[f.manga_id], "cover": by_id[f.manga_id].cover_path} for f in favorites if f.manga_id in by_id]
+    tr_manga = [{"manga": by_id[t.manga_id], "cover": by_id[t.manga_id].cover_path} for t in to_read_items if t.manga_id in by_id]
             
     return render_template("user/profile.html", favorites=fav_manga, to_read=tr_manga)
@@ -15,3 +15,30 @@ class BaseConfig:
         "STORAGE_RUN_LOGS_PATH",
         os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "storage", "run_logs"),
     )
+    STORAGE_CACHE_PATH = os.environ.get(
+        "STORAGE_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "storage", "cache"),
+    )
+    # Anonymous catalog/reader page cache: "memory" (per-process LRU),
+    # "sqlite" (shared file under STORAGE_CACHE_PATH) or "none".
+    RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+    # How /storage/manga/ hands page bytes to the client:
+    #   "none"       - Flask sends the file itself (via wsgi.file_wrapper, which
+    #                  servers such as gunicorn turn into sendfile(2));
+    #   "x-accel"    - nginx serves it from an internal location, e.g.
+    #                  location /_storage/manga/ { internal; alias <STORAGE_MANGA_PATH>/; }
+    #   "x-sendfile" - Apache mod_xsendfile / lighttpd serve the absolute path.
+    STORAGE_OFFLOAD = os.environ.get("STORAGE_OFFLOAD", "none")
+    STORAGE_ACCEL_PREFIX = os.environ.get("STORAGE_ACCEL_PREFIX", "/_storage/manga/")
+    # Stored pages never change under the same URL, so browsers may keep them.
+    STORAGE_MAX_AGE = int(os.environ.get("STORAGE_MAX_AGE", str(365 * 24 * 3600)))
+    # Cover thumbnails (/storage/thumbs/<width>/...) live under STORAGE_CACHE_PATH/thumbs;
+    # least recently used ones are evicted past this size.
+    THUMB_CACHE_MAX_BYTES = int(os.environ.get("THUMB_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+    THUMB_QUALITY = int(os.environ.get("THUMB_QUALITY", "80"))
+    # Reading progress is buffered per worker and upserted in batches every
+    # PROGRESS_FLUSH_INTERVAL seconds or once PROGRESS_FLUSH_SIZE readers are
+    # pending; an interval of 0 writes every update through.
+    PROGRESS_FLUSH_INTERVAL = float(os.environ.get("PROGRESS_FLUSH_INTERVAL", "5"))
+    PROGRESS_FLUSH_SIZE = int(os.environ.get("PROGRESS_FLUSH_SIZE", "200"))
@@ -9,6 +9,9 @@ class Chapter(db.Model):
     title = db.Column(db.String(255), nullable=True)
 
     manga_id = db.Column(db.Integer, db.ForeignKey("manga.id"), nullable=False)
+
+    # Serves per-manga listings and ChapterRepository.get_neighbors.
+    __table_args__ = (db.Index("ix_chapter_manga_id_number", "manga_id", "number"),)
     manga = db.relationship("Manga", back_populates="chapters", lazy="joined")
 
     pages = db.relationship("Page", back_populates="chapter", lazy="select")
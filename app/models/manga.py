@@ -1,5 +1,6 @@
 import re
 import unicodedata
+from datetime import datetime
 from app import db
 
 
@@ -11,6 +12,22 @@ class Manga(db.Model):
     slug = db.Column(db.String(255), unique=True, nullable=True)
     description = db.Column(db.Text, nullable=True)
 
+    # Denormalized by the indexer (MangaRepository.refresh_counters) so list
+    # pages never walk chapters and pages.
+    cover_path = db.Column(db.String(512), nullable=True)
+    chapter_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    page_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    latest_chapter_number = db.Column(db.Integer, nullable=True)
+    # Bumped by the indexer whenever chapters or pages change.
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # One index per keyset sort order in MangaRepository.SORTS.
+    __table_args__ = (
+        db.Index("ix_manga_title_id", "title", "id"),
+        db.Index("ix_manga_updated_at_id", "updated_at", "id"),
+        db.Index("ix_manga_chapter_count_id", "chapter_count", "id"),
+    )
+
     chapters = db.relationship("Chapter", back_populates="manga", lazy="select")
 
     @staticmethod
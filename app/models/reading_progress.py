@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from app import db
 
 
@@ -9,4 +11,12 @@ class ReadingProgress(db.Model):
     manga_id = db.Column(db.Integer, nullable=False)
     chapter_id = db.Column(db.Integer, nullable=False)
     last_page_number = db.Column(db.Integer, nullable=True)
+    # Server time of the update; an upsert never replaces a newer row.
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
+    # When the reader opened chapter_id; orders updates across chapters.
+    chapter_opened_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow)
 
+    # One row per reader and series; the write-behind buffer upserts on it.
+    __table_args__ = (
+        db.Index("uq_reading_progress_user_manga", "user_id", "manga_id", unique=True),
+    )
@@ -1,3 +1,5 @@
+from sqlalchemy.orm import lazyload
+
 from app.models.chapter import Chapter
 
 
@@ -12,3 +14,13 @@ class ChapterRepository:
     def get_by_id(self, chapter_id):
         return Chapter.query.get(chapter_id)
 
+    def get_neighbors(self, chapter):
+        """``(previous, next)`` chapters of the same manga by number.
+
+        Two single-row seeks on ix_chapter_manga_id_number instead of
+        loading the whole series.
+        """
+        base = Chapter.query.options(lazyload(Chapter.manga)).filter(Chapter.manga_id == chapter.manga_id)
+        previous = base.filter(Chapter.number < chapter.number).order_by(Chapter.number.desc()).first()
+        following = base.filter(Chapter.number > chapter.number).order_by(Chapter.number.asc()).first()
+        return previous, following
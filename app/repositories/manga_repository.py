@@ -1,13 +1,110 @@
+from datetime import datetime
+
+from sqlalchemy import func, tuple_
+
+from app import db
 from app.models.manga import Manga
+from app.models.chapter import Chapter
+from app.models.page import Page
+
+
+SORT_ATTRIBUTES = {"title": "title", "updated": "updated_at", "chapters": "chapter_count"}
 
 
 class MangaRepository:
+    # sort name -> (column, descending); ties are broken by id in the same
+    # direction so (column, id) is a unique, index-backed keyset.
+    SORTS = {
+        "title": (Manga.title, False),
+        "updated": (Manga.updated_at, True),
+        "chapters": (Manga.chapter_count, True),
+    }
+
     def get_all(self):
         return Manga.query.order_by(Manga.title).all()
 
+    def count(self):
+        return Manga.query.count()
+
+    def get_page(self, sort="title", key=None, backwards=False, limit=24):
+        """``(manga, has_more)``: up to ``limit`` manga after ``key`` in display order.
+
+        ``key`` is the ``(sort value, id)`` of the row the page starts from;
+        with ``backwards`` the page ends just before it instead. ``has_more``
+        says whether further rows exist in the direction of travel.
+        """
+        column, descending = self.SORTS[sort]
+        forward_desc = descending != backwards
+        query = Manga.query
+        if key is not None:
+            keyset = tuple_(column, Manga.id)
+            bound = tuple_(key[0], key[1])
+            query = query.filter(keyset < bound if forward_desc else keyset > bound)
+        if forward_desc:
+            query = query.order_by(column.desc(), Manga.id.desc())
+        else:
+            query = query.order_by(column.asc(), Manga.id.asc())
+        rows = query.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if backwards:
+            rows.reverse()
+        return rows, has_more
+
+    @staticmethod
+    def sort_value(manga, sort):
+        value = getattr(manga, SORT_ATTRIBUTES[sort])
+        return value.isoformat() if isinstance(value, datetime) else value
+
+    @staticmethod
+    def parse_sort_value(sort, value):
+        if sort == "updated":
+            return datetime.fromisoformat(value)
+        if sort == "chapters":
+            return int(value)
+        return str(value)
+
     def get_by_id(self, manga_id):
         return Manga.query.get(manga_id)
 
+    def get_by_ids(self, manga_ids):
+        if not manga_ids:
+            return []
+        return Manga.query.filter(Manga.id.in_(manga_ids)).all()
+
     def get_by_slug(self, slug):
         return Manga.query.filter_by(slug=slug).first()
 
+    def refresh_counters(self, manga):
+        chapter_count, latest = (
+            db.session.query(func.count(Chapter.id), func.max(Chapter.number))
+            .filter(Chapter.manga_id == manga.id)
+            .one()
+        )
+        page_count = (
+            db.session.query(func.count(Page.id))
+            .join(Chapter, Page.chapter_id == Chapter.id)
+            .filter(Chapter.manga_id == manga.id)
+            .scalar()
+        )
+        cover = (
+            db.session.query(Page.image_path)
+            .join(Chapter, Page.chapter_id == Chapter.id)
+            .filter(Chapter.manga_id == manga.id)
+            .order_by(Chapter.number.asc(), Page.number.asc())
+            .first()
+        )
+        if manga.chapter_count != (chapter_count or 0) or manga.page_count != (page_count or 0):
+            manga.updated_at = datetime.utcnow()
+        manga.chapter_count = chapter_count or 0
+        manga.page_count = page_count or 0
+        manga.latest_chapter_number = latest
+        manga.cover_path = cover[0] if cover else None
+
+    def library_totals(self):
+        manga_count, chapter_count, page_count = db.session.query(
+            func.count(Manga.id),
+            func.coalesce(func.sum(Manga.chapter_count), 0),
+            func.coalesce(func.sum(Manga.page_count), 0),
+        ).one()
+        return {"mangas": manga_count, "chapters": chapter_count, "pages": page_count}
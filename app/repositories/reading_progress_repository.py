@@ -1,3 +1,7 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+
 from app import db
 from app.models.reading_progress import ReadingProgress
 
@@ -9,17 +13,73 @@ class ReadingProgressRepository:
             manga_id=manga_id,
         ).first()
 
-    def set_last_read_chapter(self, user_id, manga_id, chapter_id):
-        progress = self.get_last_read_chapter(user_id, manga_id)
-        if progress is None:
-            progress = ReadingProgress(
-                user_id=user_id,
-                manga_id=manga_id,
-                chapter_id=chapter_id,
-                last_page_number=None,
-            )
-            db.session.add(progress)
-        else:
-            progress.chapter_id = chapter_id
-            progress.last_page_number = None
+    def set_last_read_chapter(self, user_id, manga_id, chapter_id, last_page_number=None):
+        now = datetime.utcnow()
+        self.upsert_many([{
+            "user_id": user_id,
+            "manga_id": manga_id,
+            "chapter_id": chapter_id,
+            "last_page_number": last_page_number,
+            "updated_at": now,
+            "chapter_opened_at": now,
+        }])
         db.session.commit()
+
+    def upsert_many(self, rows):
+        """Insert or replace progress rows in one statement, keyed on (user_id, manga_id).
+
+        Workers flush out of order, so a row never replaces a newer one:
+        within the same chapter the later update wins, across chapters the
+        later chapter open does (a late beacon from a page the reader has
+        already left must not undo the next chapter). A row without a page
+        keeps the stored page when it names the same chapter.
+        """
+        if not rows:
+            return
+        dialect = db.engine.dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+            table = ReadingProgress.__table__
+            stmt = insert(table).values(rows)
+            excluded = stmt.excluded
+            same_chapter = excluded.chapter_id == table.c.chapter_id
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "manga_id"],
+                set_={
+                    "chapter_id": excluded.chapter_id,
+                    "last_page_number": db.case(
+                        (db.and_(same_chapter, excluded.last_page_number.is_(None)), table.c.last_page_number),
+                        else_=excluded.last_page_number,
+                    ),
+                    "updated_at": excluded.updated_at,
+                    "chapter_opened_at": db.case(
+                        (db.and_(same_chapter, table.c.chapter_opened_at > excluded.chapter_opened_at), table.c.chapter_opened_at),
+                        else_=excluded.chapter_opened_at,
+                    ),
+                },
+                where=db.case(
+                    (same_chapter, db.or_(table.c.updated_at.is_(None), excluded.updated_at >= table.c.updated_at)),
+                    else_=db.or_(table.c.chapter_opened_at.is_(None), excluded.chapter_opened_at >= table.c.chapter_opened_at),
+                ),
+            )
+            db.session.execute(stmt)
+            return
+        for row in rows:
+            progress = self.get_last_read_chapter(row["user_id"], row["manga_id"])
+            if progress is None:
+                db.session.add(ReadingProgress(**row))
+                continue
+            if progress.chapter_id == row["chapter_id"]:
+                if progress.updated_at is not None and row["updated_at"] < progress.updated_at:
+                    continue
+                if row["last_page_number"] is not None:
+                    progress.last_page_number = row["last_page_number"]
+                if progress.chapter_opened_at is None or row["chapter_opened_at"] > progress.chapter_opened_at:
+                    progress.chapter_opened_at = row["chapter_opened_at"]
+            else:
+                if progress.chapter_opened_at is not None and row["chapter_opened_at"] < progress.chapter_opened_at:
+                    continue
+                progress.chapter_id = row["chapter_id"]
+                progress.last_page_number = row["last_page_number"]
+                progress.chapter_opened_at = row["chapter_opened_at"]
+            progress.updated_at = row["updated_at"]
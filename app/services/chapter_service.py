@@ -10,6 +10,9 @@ class ChapterService:
     def list_chapters_for_manga(self, manga_id):
         return self.chapter_repository.get_for_manga(manga_id)
 
+    def get_neighbors(self, chapter):
+        return self.chapter_repository.get_neighbors(chapter)
+
     def get_chapter_with_pages(self, chapter_id):
         chapter = self.chapter_repository.get_by_id(chapter_id)
         if not chapter:
@@ -0,0 +1,123 @@
+# Weak ETags for the detail and reader pages, derived from the rows they render.
+
+import hashlib
+import os
+from typing import Optional
+
+from flask import current_app, request
+from sqlalchemy import func
+
+from app import db
+from app.models.chapter import Chapter
+from app.models.comment import Comment
+from app.models.page import Page
+from app.services.thumbnails import cover_relpath, source_version
+
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
+
+_template_version: Optional[str] = None
+
+
+def template_version() -> str:
+    """Changes whenever a template file does, so a deploy never serves a stale 304.
+
+    Based on file mtimes and sizes rather than process start, so every
+    worker of the same release agrees.
+    """
+    global _template_version
+    if _template_version is None:
+        parts = []
+        for current, _, files in os.walk(TEMPLATES_DIR):
+            for name in sorted(files):
+                try:
+                    st = os.stat(os.path.join(current, name))
+                except OSError:
+                    continue
+                parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+        _template_version = hashlib.sha1("|".join(sorted(parts)).encode("utf-8")).hexdigest()[:12]
+    return _template_version
+
+
+def _comments_version(manga_id: int, chapter_id: Optional[int]) -> tuple:
+    # Count catches deletes of older comments; max updated_at catches edits.
+    return db.session.query(
+        func.count(Comment.id), func.max(Comment.id), func.max(Comment.updated_at)
+    ).filter(Comment.manga_id == manga_id, Comment.chapter_id == chapter_id).one()
+
+
+def _chapters_version(manga_id: int) -> tuple:
+    # Catches chapters added or removed without the counters being refreshed.
+    return db.session.query(
+        func.count(Chapter.id), func.max(Chapter.id), func.max(Chapter.number)
+    ).filter(Chapter.manga_id == manga_id).one()
+
+
+def _pages_version(chapter_id: int) -> tuple:
+    return db.session.query(func.count(Page.id), func.max(Page.id)).filter(Page.chapter_id == chapter_id).one()
+
+
+def _cover_version(cover_path: Optional[str]) -> Optional[str]:
+    # The page links thumbnails by cover mtime; a replaced cover must change the tag.
+    relpath = cover_relpath(cover_path)
+    return source_version(relpath) if relpath else None
+
+
+def make_etag(*parts) -> str:
+    raw = "|".join(str(p) for p in (template_version(),) + parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def manga_detail_etag(manga, user_id=None, personal=()) -> str:
+    """Covers the chapter list, the manga-level comments and, for a
+    logged-in user, their own state."""
+    return make_etag(
+        "detail",
+        manga.id,
+        manga.title,
+        manga.description,
+        manga.cover_path,
+        _cover_version(manga.cover_path),
+        manga.updated_at,
+        manga.chapter_count,
+        manga.page_count,
+        _chapters_version(manga.id),
+        _comments_version(manga.id, None),
+        user_id,
+        *personal,
+    )
+
+
+def chapter_read_etag(manga, chapter, user_id=None) -> str:
+    """Covers the chapter's pages, its comments and its neighbours."""
+    return make_etag(
+        "read",
+        manga.id,
+        manga.title,
+        manga.updated_at,
+        manga.chapter_count,
+        chapter.id,
+        chapter.number,
+        chapter.title,
+        _chapters_version(manga.id),
+        _pages_version(chapter.id),
+        _comments_version(manga.id, chapter.id),
+        user_id,
+    )
+
+
+def not_modified(etag: str):
+    """A bodyless 304 if the client already holds ``etag``, else None."""
+    if not request.if_none_match.contains_weak(etag):
+        return None
+    response = current_app.response_class(status=304)
+    finish(response, etag)
+    return response
+
+
+def finish(response, etag: str):
+    response.set_etag(etag, weak=True)
+    # The body differs for logged-in users; caches must key on the session.
+    response.vary.add("Cookie")
+    response.headers.setdefault("Cache-Control", "private, no-cache")
+    return response
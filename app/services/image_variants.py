@@ -0,0 +1,93 @@
+# Pre-generated modern-format page variants: Accept negotiation and popularity ordering.
+
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+
+from app import db
+from app.models.manga import Manga
+from app.models.chapter import Chapter
+from app.models.page import Page
+from app.models.favorite import Favorite
+from app.models.reading_progress import ReadingProgress
+
+
+# Written next to the originals by the scraper's --webp stage or by
+# `python -m indexer.indexer --variants`: <chapter>/.variants/<stem>.<fmt>
+VARIANTS_DIRNAME = ".variants"
+# Most compact first; the first one the client accepts and that exists wins.
+VARIANT_TYPES = [("avif", "image/avif"), ("webp", "image/webp")]
+NEGOTIABLE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def variant_relpath(relpath: str, fmt: str) -> str:
+    directory, name = os.path.split(relpath)
+    stem, _ = os.path.splitext(name)
+    return os.path.join(directory, VARIANTS_DIRNAME, f"{stem}.{fmt}").replace(os.sep, "/")
+
+
+def is_negotiable(relpath: str) -> bool:
+    return os.path.splitext(relpath.lower())[1] in NEGOTIABLE_EXTS and f"/{VARIANTS_DIRNAME}/" not in f"/{relpath}"
+
+
+def pick_variant(base_path: str, relpath: str, accept_mimetypes) -> Optional[Tuple[str, str]]:
+    """``(variant relpath, mimetype)`` to send instead of ``relpath``, if any.
+
+    Only formats the client names explicitly count: a bare ``*/*`` (curl,
+    old browsers) keeps getting the original.
+    """
+    accepted = {value for value, quality in accept_mimetypes if quality > 0}
+    _, ext = os.path.splitext(relpath.lower())
+    for fmt, mimetype in VARIANT_TYPES:
+        if mimetype not in accepted or ext == f".{fmt}":
+            continue
+        candidate = variant_relpath(relpath, fmt)
+        full_path = os.path.join(base_path, *candidate.split("/"))
+        if os.path.isfile(full_path):
+            return candidate, mimetype
+    return None
+
+
+def manga_by_popularity(limit: Optional[int] = None) -> List[Manga]:
+    """Every manga, most read and favourited first."""
+    readers = (
+        db.session.query(ReadingProgress.manga_id, func.count(ReadingProgress.id).label("n"))
+        .group_by(ReadingProgress.manga_id)
+        .subquery()
+    )
+    favourites = (
+        db.session.query(Favorite.manga_id, func.count(Favorite.id).label("n"))
+        .group_by(Favorite.manga_id)
+        .subquery()
+    )
+    score = func.coalesce(readers.c.n, 0) + func.coalesce(favourites.c.n, 0)
+    query = (
+        db.session.query(Manga)
+        .outerjoin(readers, readers.c.manga_id == Manga.id)
+        .outerjoin(favourites, favourites.c.manga_id == Manga.id)
+        .order_by(score.desc(), Manga.id.asc())
+    )
+    if limit:
+        query = query.limit(limit)
+    return query.all()
+
+
+def page_files_for_manga(base_path: str, manga_id: int) -> List[str]:
+    """Filesystem paths of a manga's pages, in reading order."""
+    rows = (
+        db.session.query(Page.image_path)
+        .join(Chapter, Page.chapter_id == Chapter.id)
+        .filter(Chapter.manga_id == manga_id)
+        .order_by(Chapter.number.asc(), Page.number.asc())
+        .all()
+    )
+    prefix = "/storage/manga/"
+    files = []
+    for (image_path,) in rows:
+        if not image_path or not image_path.startswith(prefix):
+            continue
+        full_path = os.path.join(base_path, *image_path[len(prefix):].split("/"))
+        if os.path.isfile(full_path):
+            files.append(full_path)
+    return files
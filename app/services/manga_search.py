@@ -0,0 +1,204 @@
+# SQLite FTS5 index over manga title/slug/description: ranked prefix search and autocomplete.
+
+import re
+import unicodedata
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, inspect
+
+from app import db
+from app.models.manga import Manga
+
+
+FTS_TABLE = "manga_fts"
+# Title matches outrank slug matches, which outrank description matches.
+RANK_WEIGHTS = (10.0, 4.0, 1.0)
+INDEXED_FIELDS = ("title", "slug", "description")
+
+# Whether the FTS table exists on the current database; set by
+# ensure_search_index() so the model events stay inert elsewhere.
+_fts_enabled = False
+
+
+def fold_text(text: Optional[str]) -> str:
+    """Lowercase and strip accents the way Manga.slugify does, keeping the words.
+
+    Turkish dotless/dotted i have no decomposition, so they are mapped by hand.
+    """
+    if not text:
+        return ""
+    text = text.replace("ı", "i").replace("İ", "i").lower()
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def _match_expression(query: str, columns: Optional[str] = None) -> Optional[str]:
+    # Every token becomes a quoted prefix term, so user input can never be
+    # parsed as FTS5 syntax (AND/OR/NEAR, column filters, stray quotes).
+    tokens = re.findall(r"\w+", fold_text(query))
+    if not tokens:
+        return None
+    terms = " ".join(f'"{token}"*' for token in tokens)
+    return f"{{{columns}}} : ({terms})" if columns else terms
+
+
+def search_enabled() -> bool:
+    return _fts_enabled
+
+
+def _row_values(manga) -> Dict[str, object]:
+    return {
+        "id": manga.id,
+        "title": fold_text(manga.title),
+        "slug": (manga.slug or "").replace("-", " "),
+        "description": fold_text(manga.description),
+    }
+
+
+def _insert_rows(connection, rows) -> None:
+    if rows:
+        connection.execute(
+            db.text(f"INSERT INTO {FTS_TABLE}(rowid, title, slug, description) VALUES (:id, :title, :slug, :description)"),
+            rows,
+        )
+
+
+def ensure_search_index() -> bool:
+    """Create the FTS table if SQLite supports it, filling it on first creation."""
+    global _fts_enabled
+    uri = str(db.engine.url)
+    if not uri.startswith("sqlite"):
+        _fts_enabled = False
+        return False
+    existing = db.session.execute(
+        db.text("SELECT name FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": FTS_TABLE},
+    ).fetchone()
+    try:
+        db.session.execute(db.text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, slug, description, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+    except Exception:
+        # SQLite built without FTS5: search keeps using LIKE.
+        db.session.rollback()
+        _fts_enabled = False
+        return False
+    _fts_enabled = True
+    if existing is None:
+        rebuild_search_index()
+    db.session.commit()
+    return True
+
+
+def rebuild_search_index() -> int:
+    if not _fts_enabled:
+        return 0
+    connection = db.session.connection()
+    connection.execute(db.text(f"DELETE FROM {FTS_TABLE}"))
+    rows = [_row_values(m) for m in Manga.query.all()]
+    _insert_rows(connection, rows)
+    return len(rows)
+
+
+def sync_search_index() -> Dict[str, int]:
+    """Reconcile the FTS table with ``manga``: drop orphans, add missing rows.
+
+    Model events keep it current for ORM writes; this catches anything
+    written around them (raw SQL, other tools, an index created late).
+    """
+    if not _fts_enabled:
+        return {"removed": 0, "added": 0}
+    connection = db.session.connection()
+    removed = connection.execute(
+        db.text(f"DELETE FROM {FTS_TABLE} WHERE rowid NOT IN (SELECT id FROM manga)")
+    ).rowcount
+    missing = Manga.query.filter(db.text(f"manga.id NOT IN (SELECT rowid FROM {FTS_TABLE})")).all()
+    _insert_rows(connection, [_row_values(m) for m in missing])
+    db.session.commit()
+    return {"removed": removed or 0, "added": len(missing)}
+
+
+def _ranked_ids(match: str, limit: int) -> List[int]:
+    weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+    rows = db.session.execute(
+        db.text(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match "
+            f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT :limit"
+        ),
+        {"match": match, "limit": limit},
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def _like_search(query: str, limit: int) -> List[Manga]:
+    pattern = f"%{query}%"
+    return (
+        Manga.query.filter(db.or_(Manga.title.ilike(pattern), Manga.slug.ilike(pattern)))
+        .order_by(Manga.title)
+        .limit(limit)
+        .all()
+    )
+
+
+def search_manga(query: str, limit: int = 100) -> List[Manga]:
+    """Manga matching every word of ``query`` as a prefix, best match first."""
+    query = (query or "").strip()
+    if not query:
+        return []
+    if not _fts_enabled:
+        return _like_search(query, limit)
+    match = _match_expression(query)
+    if match is None:
+        return []
+    ids = _ranked_ids(match, limit)
+    if not ids:
+        return []
+    by_id = {m.id: m for m in Manga.query.filter(Manga.id.in_(ids)).all()}
+    return [by_id[i] for i in ids if i in by_id]
+
+
+def suggest_manga(query: str, limit: int = 8) -> List[Dict[str, object]]:
+    """Lightweight autocomplete rows; matches titles and slugs only."""
+    query = (query or "").strip()
+    if not query:
+        return []
+    if not _fts_enabled:
+        return [{"id": m.id, "title": m.title, "slug": m.slug} for m in _like_search(query, limit)]
+    match = _match_expression(query, columns="title slug")
+    if match is None:
+        return []
+    weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+    rows = db.session.execute(
+        db.text(
+            f"SELECT m.id, m.title, m.slug FROM {FTS_TABLE} JOIN manga m ON m.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH :match ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT :limit"
+        ),
+        {"match": match, "limit": limit},
+    ).fetchall()
+    return [{"id": r[0], "title": r[1], "slug": r[2]} for r in rows]
+
+
+@event.listens_for(Manga, "after_insert")
+def _index_inserted(mapper, connection, target):
+    if _fts_enabled:
+        _insert_rows(connection, [_row_values(target)])
+
+
+@event.listens_for(Manga, "after_update")
+def _index_updated(mapper, connection, target):
+    if not _fts_enabled:
+        return
+    # Counter refreshes touch every manga on each index run; skip those.
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in INDEXED_FIELDS):
+        return
+    connection.execute(db.text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
+    _insert_rows(connection, [_row_values(target)])
+
+
+@event.listens_for(Manga, "after_delete")
+def _index_deleted(mapper, connection, target):
+    if _fts_enabled:
+        connection.execute(db.text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": target.id})
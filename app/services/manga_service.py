@@ -1,5 +1,9 @@
+import base64
+import json
+
 from app.repositories.manga_repository import MangaRepository
 from app.repositories.chapter_repository import ChapterRepository
+from app.services.manga_search import search_manga, suggest_manga
 
 
 class MangaService:
@@ -10,6 +14,54 @@ class MangaService:
     def list_manga(self):
         return self.manga_repository.get_all()
 
+    def count_manga(self):
+        return self.manga_repository.count()
+
+    def list_manga_page(self, sort="title", after=None, before=None, limit=24):
+        """One keyset page of the catalog plus opaque cursors for its neighbours."""
+        if sort not in self.manga_repository.SORTS:
+            sort = "title"
+        limit = max(1, min(int(limit or 24), 100))
+        cursor = before or after
+        key = self._decode_cursor(cursor, sort) if cursor else None
+        backwards = bool(before) and key is not None
+        items, has_more = self.manga_repository.get_page(sort, key=key, backwards=backwards, limit=limit)
+        next_cursor = prev_cursor = None
+        if items:
+            # Paging back from a later page proves a next page exists; paging
+            # forward from a cursor proves a previous one does.
+            if backwards or has_more:
+                next_cursor = self._encode_cursor(sort, items[-1])
+            if key is not None and (has_more or not backwards):
+                prev_cursor = self._encode_cursor(sort, items[0])
+        return {
+            "items": items,
+            "sort": sort,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
+        }
+
+    def _encode_cursor(self, sort, manga):
+        raw = json.dumps([sort, self.manga_repository.sort_value(manga, sort), manga.id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+    def _decode_cursor(self, cursor, sort):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            cursor_sort, value, manga_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            if cursor_sort != sort:
+                return None
+            return self.manga_repository.parse_sort_value(sort, value), int(manga_id)
+        except Exception:
+            return None
+
+    def search(self, query, limit=100):
+        return search_manga(query, limit=limit)
+
+    def suggest(self, query, limit=8):
+        return suggest_manga(query, limit=limit)
+
     def get_manga(self, manga_id):
         return self.manga_repository.get_by_id(manga_id)
 
@@ -0,0 +1,182 @@
+# Write-behind buffer for reading progress: page views coalesce in memory and flush as batched upserts.
+
+import atexit
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from flask import current_app, has_app_context
+
+from app import db
+from app.repositories.reading_progress_repository import ReadingProgressRepository
+
+
+Key = Tuple[int, int]
+# (chapter_id, last_page_number, updated_at, chapter_opened_at)
+Pending = Tuple[int, Optional[int], datetime, datetime]
+
+# Rows per INSERT ... ON CONFLICT statement; keeps well under SQLite's bound-parameter limit.
+UPSERT_CHUNK = 200
+
+
+class ProgressBuffer:
+    """Last-write-wins map of (user_id, manga_id) -> progress, flushed in batches.
+
+    Flushes happen when ``max_size`` keys are pending, every ``interval``
+    seconds from a daemon thread, and at interpreter exit. With
+    ``interval <= 0`` every update is written through immediately.
+    Each worker process has its own buffer and flushes on its own timer,
+    so every entry carries the server time of the update and of the
+    chapter open it belongs to; the upsert skips rows older than the
+    stored one (see ``ReadingProgressRepository.upsert_many``).
+    """
+
+    def __init__(self, app, interval: float = 5.0, max_size: int = 200, repository=None):
+        self.app = app
+        self.interval = interval
+        self.max_size = max_size
+        self.repository = repository or ReadingProgressRepository()
+        self._pending: Dict[Key, Pending] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.updates = 0
+        self.flushes = 0
+        self.rows_written = 0
+
+    def add(self, user_id: int, manga_id: int, chapter_id: int, last_page_number: Optional[int] = None, opened_at: Optional[datetime] = None) -> bool:
+        """Queue an update; False if a later chapter open already superseded it.
+
+        ``opened_at`` is when the reader opened ``chapter_id`` (now for a
+        chapter open). Without a page, a pending page of the same chapter
+        is kept.
+        """
+        key = (int(user_id), int(manga_id))
+        chapter_id = int(chapter_id)
+        now = datetime.utcnow()
+        opened_at = opened_at or now
+        with self._lock:
+            current = self._pending.get(key)
+            if current is not None:
+                if current[0] == chapter_id:
+                    if last_page_number is None:
+                        last_page_number = current[1]
+                    opened_at = max(opened_at, current[3])
+                elif current[3] > opened_at:
+                    # A beacon from a page left behind for a newer chapter.
+                    return False
+            self._pending[key] = (chapter_id, last_page_number, now, opened_at)
+            self.updates += 1
+            size = len(self._pending)
+        if self.interval <= 0 or size >= self.max_size:
+            try:
+                self.flush()
+            except Exception:
+                # Kept in the buffer; the next flush retries. A page view
+                # must not fail because progress could not be saved.
+                self.app.logger.exception("Reading progress flush failed; will retry")
+        else:
+            self._ensure_thread()
+        return True
+
+    def get(self, user_id: int, manga_id: int) -> Optional[Pending]:
+        with self._lock:
+            return self._pending.get((int(user_id), int(manga_id)))
+
+    def flush(self) -> int:
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            rows = [
+                {
+                    "user_id": u,
+                    "manga_id": m,
+                    "chapter_id": chapter_id,
+                    "last_page_number": page,
+                    "updated_at": updated_at,
+                    "chapter_opened_at": opened_at,
+                }
+                for (u, m), (chapter_id, page, updated_at, opened_at) in batch.items()
+            ]
+            try:
+                if has_app_context():
+                    # Reuse the request's session: a second connection would
+                    # wait on the SQLite lock held by this one.
+                    self._write(rows)
+                else:
+                    with self.app.app_context():
+                        self._write(rows)
+            except Exception:
+                # Put the batch back unless a newer update arrived meanwhile.
+                with self._lock:
+                    for key, value in batch.items():
+                        self._pending.setdefault(key, value)
+                raise
+            self.flushes += 1
+            self.rows_written += len(rows)
+            return len(rows)
+
+    def _write(self, rows) -> None:
+        try:
+            for start in range(0, len(rows), UPSERT_CHUNK):
+                self.repository.upsert_many(rows[start:start + UPSERT_CHUNK])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Reading progress flush failed; will retry")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "updates": self.updates,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
+
+
+_buffer: Optional[ProgressBuffer] = None
+_buffer_lock = threading.Lock()
+
+
+def get_progress_buffer() -> ProgressBuffer:
+    global _buffer
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                _buffer = ProgressBuffer(
+                    current_app._get_current_object(),
+                    interval=float(current_app.config.get("PROGRESS_FLUSH_INTERVAL", 5)),
+                    max_size=int(current_app.config.get("PROGRESS_FLUSH_SIZE", 200)),
+                )
+                atexit.register(_flush_at_exit)
+    return _buffer
+
+
+def _flush_at_exit() -> None:
+    if _buffer is not None:
+        try:
+            _buffer.flush()
+        except Exception:
+            pass
@@ -1,6 +1,10 @@
+from datetime import datetime
+
+from app.models.reading_progress import ReadingProgress
 from app.repositories.reading_progress_repository import (
     ReadingProgressRepository,
 )
+from app.services.progress_buffer import get_progress_buffer
 
 
 class ReadingProgressService:
@@ -8,7 +12,36 @@ class ReadingProgressService:
         self.repository = repository or ReadingProgressRepository()
 
     def get_last_read_chapter(self, user_id, manga_id):
-        return self.repository.get_last_read_chapter(user_id, manga_id)
+        # Buffered updates win over the stored row, so a reader sees their
+        # own progress before it is flushed.
+        pending = get_progress_buffer().get(user_id, manga_id)
+        if pending is None:
+            return self.repository.get_last_read_chapter(user_id, manga_id)
+        chapter_id, last_page_number, updated_at, chapter_opened_at = pending
+        if last_page_number is None:
+            # A re-opened chapter keeps its stored page until the flush.
+            stored = self.repository.get_last_read_chapter(user_id, manga_id)
+            if stored is not None and stored.chapter_id == chapter_id:
+                last_page_number = stored.last_page_number
+        return ReadingProgress(
+            user_id=user_id,
+            manga_id=manga_id,
+            chapter_id=chapter_id,
+            last_page_number=last_page_number,
+            updated_at=updated_at,
+            chapter_opened_at=chapter_opened_at,
+        )
 
     def set_last_read_chapter(self, user_id, manga_id, chapter_id):
-        self.repository.set_last_read_chapter(user_id, manga_id, chapter_id)
+        """Record a chapter open and return its time, for the reader's beacons.
+
+        No lookup here: re-opening the same chapter keeps the saved page
+        because the buffer and the upsert both keep it for page-less rows.
+        """
+        opened_at = datetime.utcnow()
+        get_progress_buffer().add(user_id, manga_id, chapter_id, opened_at=opened_at)
+        return opened_at
+
+    def set_last_read_page(self, user_id, manga_id, chapter_id, page_number, opened_at=None):
+        # False when a chapter opened after ``opened_at`` already replaced it.
+        return get_progress_buffer().add(user_id, manga_id, chapter_id, page_number, opened_at=opened_at)
@@ -0,0 +1,238 @@
+# Whole-response cache for anonymous catalog views, invalidated by a library generation number.
+
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from flask import current_app, has_app_context, make_response, request, session
+
+
+# (status, content type, body, ETag header or None)
+Entry = Tuple[int, str, bytes, Optional[str]]
+
+GENERATION_FILENAME = "library_generation"
+
+
+class MemoryBackend:
+    """Per-process LRU; each worker warms its own copy."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: Entry, generation: str) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def purge(self, generation: str) -> None:
+        prefix = f"{generation}:"
+        with self._lock:
+            for key in [k for k in self._entries if not k.startswith(prefix)]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """File-backed store shared by every worker on the host."""
+
+    name = "sqlite"
+
+    def __init__(self, path: str, max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, generation TEXT NOT NULL, status INTEGER NOT NULL, "
+                "content_type TEXT NOT NULL, body BLOB NOT NULL, etag TEXT, used_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_responses_used_at ON responses (used_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Entry]:
+        row = self._connect().execute(
+            "SELECT status, content_type, body, etag FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], bytes(row[2]), row[3]
+
+    def set(self, key: str, entry: Entry, generation: str) -> None:
+        conn = self._connect()
+        status, content_type, body, etag = entry
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, generation, status, content_type, body, etag, used_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, generation, status, content_type, body, etag, time.time()),
+        )
+        # Trim by insertion time; hits are not tracked to keep reads read-only.
+        conn.execute(
+            "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def purge(self, generation: str) -> None:
+        self._connect().execute("DELETE FROM responses WHERE generation != ?", (generation,))
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class ResponseCache:
+    def __init__(self, backend, generation_path: str):
+        self.backend = backend
+        self.generation_path = generation_path
+        self.hits = 0
+        self.misses = 0
+        self._seen_generation: Optional[str] = None
+
+    def generation(self) -> str:
+        try:
+            with open(self.generation_path, "r", encoding="utf-8") as f:
+                generation = f.read().strip() or "0"
+        except OSError:
+            generation = "0"
+        if generation != self._seen_generation:
+            # First request after an index run or comment: drop what is now stale.
+            if self._seen_generation is not None:
+                self.backend.purge(generation)
+            self._seen_generation = generation
+        return generation
+
+    def get(self, path: str) -> Optional[Entry]:
+        entry = self.backend.get(f"{self.generation()}:{path}")
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, path: str, entry: Entry) -> None:
+        generation = self.generation()
+        self.backend.set(f"{generation}:{path}", entry, generation)
+
+    def stats(self) -> Dict[str, object]:
+        total = self.hits + self.misses
+        return {
+            "backend": self.backend.name,
+            "generation": self.generation(),
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+        }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def _generation_path() -> str:
+    return os.path.join(current_app.config.get("STORAGE_CACHE_PATH"), GENERATION_FILENAME)
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide cache configured by RESPONSE_CACHE_BACKEND, or None when disabled."""
+    global _cache
+    backend_name = (current_app.config.get("RESPONSE_CACHE_BACKEND") or "none").lower()
+    if backend_name == "none":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                max_entries = int(current_app.config.get("RESPONSE_CACHE_MAX_ENTRIES") or 512)
+                if backend_name == "sqlite":
+                    path = os.path.join(current_app.config.get("STORAGE_CACHE_PATH"), "responses.sqlite3")
+                    backend = SQLiteBackend(path, max_entries=max_entries)
+                else:
+                    backend = MemoryBackend(max_entries=max_entries)
+                _cache = ResponseCache(backend, _generation_path())
+    return _cache
+
+
+def bump_generation() -> Optional[str]:
+    """Invalidate every cached response, in this process and in every other.
+
+    The generation lives in a file so the indexer CLI and all web workers
+    agree on it. Safe to call outside an app context (it is then a no-op).
+    """
+    if not has_app_context() or not current_app.config.get("STORAGE_CACHE_PATH"):
+        return None
+    path = _generation_path()
+    generation = str(time.time_ns())
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(tmp_path, path)
+    except OSError:
+        return None
+    return generation
+
+
+def cache_stats() -> Optional[Dict[str, object]]:
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else None
+
+
+def cached_for_anonymous(view):
+    """Serve GET responses for logged-out visitors from the response cache.
+
+    Logged-in pages carry per-user state (favourites, progress, comment
+    controls) and are always rendered. Reading the session here also makes
+    Flask send ``Vary: Cookie`` for every response of the view.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        cache = get_response_cache()
+        if cache is None or request.method != "GET" or session.get("user_id"):
+            return view(*args, **kwargs)
+        path = request.full_path
+        entry = cache.get(path)
+        if entry is not None:
+            status, content_type, body, etag = entry
+            response = make_response(body, status)
+            response.content_type = content_type
+            if etag:
+                response.headers["ETag"] = etag
+                response.headers["Cache-Control"] = "private, no-cache"
+                response.vary.add("Cookie")
+                # Revalidation of a cached page needs no DB work at all.
+                response.make_conditional(request)
+            response.headers["X-Cache"] = "HIT"
+            return response
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.direct_passthrough and "Set-Cookie" not in response.headers:
+            cache.set(path, (response.status_code, response.content_type, response.get_data(), response.headers.get("ETag")))
+        response.headers["X-Cache"] = "MISS"
+        return response
+    return wrapper
@@ -15,13 +15,39 @@ def _parse_run_file(filepath: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def _metrics_summary(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    metrics = data.get("metrics")
+    if not isinstance(metrics, dict):
+        return None
+    requests = metrics.get("requests") or {}
+    html = requests.get("html") or {}
+    image = requests.get("image") or {}
+    chapters = metrics.get("chapters") or {}
+    return {
+        "run_id": data.get("run_id"),
+        "type": data.get("type"),
+        "manga_slug": data.get("manga_slug"),
+        "started_at": data.get("started_at"),
+        "status": data.get("status"),
+        "bytes_downloaded": metrics.get("bytes_downloaded"),
+        "avg_throughput_bps": metrics.get("avg_throughput_bps"),
+        "html_p95_sec": html.get("p95_sec"),
+        "image_p50_sec": image.get("p50_sec"),
+        "image_p95_sec": image.get("p95_sec"),
+        "retries_total": metrics.get("retries_total"),
+        "retries_by_host": metrics.get("retries_by_host") or {},
+        "avg_chapter_sec": chapters.get("avg_sec"),
+    }
+
+
 def get_runs_status(limit: int = 10) -> Dict[str, Any]:
     run_logs_path = current_app.config.get("STORAGE_RUN_LOGS_PATH")
     if not run_logs_path or not os.path.exists(run_logs_path):
         return {
             "last_scraper_run": None,
             "last_indexer_run": None,
-            "recent_runs": []
+            "recent_runs": [],
+            "scraper_metrics_trend": []
         }
 
     files = []
@@ -56,8 +82,19 @@ def get_runs_status(limit: int = 10) -> Dict[str, Any]:
         if len(recent_runs) >= limit and last_scraper and last_indexer:
             break
 
+    # Newest first; comparing these across runs shows CDN slowdowns or
+    # retry storms that the page counts alone hide.
+    trend = []
+    for data in recent_runs:
+        if data.get("component") != "scraper":
+            continue
+        summary = _metrics_summary(data)
+        if summary is not None:
+            trend.append(summary)
+
     return {
         "last_scraper_run": last_scraper,
         "last_indexer_run": last_indexer,
-        "recent_runs": recent_runs
+        "recent_runs": recent_runs,
+        "scraper_metrics_trend": trend
     }
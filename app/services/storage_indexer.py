@@ -1,6 +1,7 @@
 # Filesystem-based manga indexer for the web app (consumer-only).
 
 import os
+import re
 import time
 import json
 import uuid
@@ -12,9 +13,13 @@ from app import db
 from app.models.manga import Manga
 from app.models.chapter import Chapter
 from app.models.page import Page
+from app.repositories.manga_repository import MangaRepository
+from app.services.manga_search import sync_search_index
+from app.services.response_cache import bump_generation
 
 
 IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+CHAPTER_MANIFEST_NAME = ".manifest.json"
 _LAST_SCAN_TS: Optional[float] = None
 _SCAN_INTERVAL_SEC: int = 60
 
@@ -27,14 +32,26 @@ def _humanize_title_from_slug(slug: str) -> str:
     return slug.replace("-", " ").replace("_", " ").strip().title()
 
 
+# Same patterns as the scraper's chapter discovery: a number after a chapter
+# label ("chapter-12", "bolum-12-5") first, else the leading number ("12.5").
+_LABELLED_NUMBER = re.compile(r"(?:chapter|chap|ch|b[oö]l[uü]m)[\s._-]*(\d+)(?:[._-](\d+))?", re.IGNORECASE)
+_PLAIN_NUMBER = re.compile(r"(\d+)(?:\.(\d+))?")
+
+
 def _parse_chapter_number(name: str) -> Optional[int]:
-    digits = "".join(ch for ch in name if ch.isdigit())
-    if not digits:
+    """Integer chapter number of a chapter directory, else None.
+
+    Decimal chapters ("12.5") are not representable in Chapter.number, so
+    they return None and the run is marked partial rather than storing
+    them under a wrong number (joining the digits made 12.5 chapter 125).
+    """
+    match = _LABELLED_NUMBER.search(name) or _PLAIN_NUMBER.search(name)
+    if not match:
         return None
-    try:
-        return int(digits)
-    except ValueError:
+    whole, fraction = match.groups()
+    if (fraction or "").strip("0"):
         return None
+    return int(whole)
 
 
 def _ensure_manga(slug: str) -> Manga:
@@ -75,6 +92,26 @@ def _ensure_page(chapter_id: int, page_number: int, image_path: str) -> Page:
     return pg
 
 
+def _images_from_manifest(ch_dir: Path) -> Optional[List[Path]]:
+    # Chapters written by the scraper carry a manifest listing their images,
+    # which saves listing (and stat-ing) every file in the directory.
+    try:
+        with open(ch_dir / CHAPTER_MANIFEST_NAME, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    entries = manifest.get("images") if isinstance(manifest, dict) else None
+    if not entries or len(entries) != manifest.get("expected_count"):
+        return None
+    images = []
+    for entry in entries:
+        name = entry.get("file") if isinstance(entry, dict) else None
+        if not name or Path(name).suffix.lower() not in IMAGE_EXTS:
+            return None
+        images.append(ch_dir / name)
+    return sorted(images)
+
+
 def _collect_fs_state(root: Path) -> Tuple[Dict[str, Dict[int, Tuple[str, List[Path]]]], Set[str], bool, int, int]:
     state: Dict[str, Dict[int, Tuple[str, List[Path]]]] = {}
     slugs: Set[str] = set()
@@ -90,7 +127,9 @@ def _collect_fs_state(root: Path) -> Tuple[Dict[str, Dict[int, Tuple[str, List[P
             if num is None:
                 partial = True
                 continue
-            images = sorted([p for p in ch_dir.iterdir() if _is_image_file(p)])
+            images = _images_from_manifest(ch_dir)
+            if images is None:
+                images = sorted([p for p in ch_dir.iterdir() if _is_image_file(p)])
             if not images:
                 partial = True
                 continue
@@ -156,6 +195,8 @@ def _synch_manga(slug: str, chapters_map: Dict[int, Tuple[str, List[Path]]], sta
                 if existing.image_path != web_path:
                     existing.image_path = web_path
         db.session.commit()
+    MangaRepository().refresh_counters(manga)
+    db.session.commit()
 
 
 def _write_indexer_log(run_logs_path: str, status: str, stats: Dict, start_time: datetime, error: Optional[str] = None, processed_slugs: Optional[List[str]] = None, files_written: int = 0, chapter_range: Optional[str] = None):
@@ -231,6 +272,8 @@ def index_storage(base_path: str, run_logs_path: str = None, force: bool = False
                 stats["removed_chapters"] += removed
         for slug, chapters_map in fs_state.items():
             _synch_manga(slug, chapters_map, stats)
+        sync_search_index()
+        bump_generation()
         status_str = "success" if not partial else "partial"
         if run_logs_path:
             _write_indexer_log(run_logs_path, status_str, stats, start_time, error=None if status_str == "success" else "Some entries skipped", processed_slugs=processed_slugs, files_written=stats["pages_added"], chapter_range=None)
@@ -0,0 +1,224 @@
+# Cover thumbnails at fixed widths, kept in a size-bounded disk cache under STORAGE_CACHE_PATH.
+
+import hashlib
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask import current_app, url_for
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; covers are then served at full size.
+    Image = None
+
+
+# Only these widths are ever generated, so the cache cannot be filled with
+# arbitrary sizes. 180 is a grid card, 360/540 cover 2x/3x screens and the
+# detail page.
+THUMB_WIDTHS = (180, 360, 540)
+THUMBS_DIRNAME = "thumbs"
+STORAGE_PREFIX = "/storage/manga/"
+
+_lock = threading.Lock()
+# Running byte total of the cache directory, per process; None until first scan.
+_cache_bytes: Optional[int] = None
+
+
+def thumbnails_available() -> bool:
+    if Image is None:
+        return False
+    try:
+        from PIL import features
+        return bool(features.check("webp"))
+    except Exception:
+        return False
+
+
+def cache_dir(cache_root: str) -> str:
+    return os.path.join(cache_root, THUMBS_DIRNAME)
+
+
+def source_key(source_path: str, width: int) -> str:
+    """Hash of the source file's identity (path, size, mtime) plus the width.
+
+    A re-scraped page gets a new mtime and therefore a new key, so stale
+    thumbnails are never served; the old file simply ages out.
+    """
+    st = os.stat(source_path)
+    raw = f"{os.path.abspath(source_path)}|{st.st_size}|{st.st_mtime_ns}|{width}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def thumbnail_path(cache_root: str, key: str) -> str:
+    return os.path.join(cache_dir(cache_root), key[:2], f"{key}.webp")
+
+
+def render_thumbnail(source_path: str, target_path: str, width: int, quality: int = 80) -> Tuple[str, int]:
+    """Write a ``width``-wide WebP of ``source_path``; returns ``(status, bytes)``.
+
+    Runs in worker processes too, so it only takes and returns plain values.
+    """
+    if os.path.exists(target_path):
+        return "fresh", os.path.getsize(target_path)
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            image.draft("RGB", (width, width * 3))
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGB")
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+            image.save(tmp_path, format="WEBP", quality=quality, method=4)
+        os.replace(tmp_path, target_path)
+        return "written", os.path.getsize(target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _scan_bytes(root: str) -> int:
+    total = 0
+    for current, _, files in os.walk(root):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(current, name))
+            except OSError:
+                pass
+    return total
+
+
+def enforce_limit(cache_root: str, max_bytes: int, added: int = 0) -> int:
+    """Evict least recently used thumbnails once the cache outgrows ``max_bytes``.
+
+    Hits refresh a file's mtime, so mtime order is LRU order. Trims to 90%
+    of the limit to avoid evicting on every write. Returns files removed.
+    """
+    global _cache_bytes
+    root = cache_dir(cache_root)
+    with _lock:
+        if _cache_bytes is None:
+            _cache_bytes = _scan_bytes(root)
+        else:
+            _cache_bytes += added
+        if not max_bytes or _cache_bytes <= max_bytes:
+            return 0
+        # Other workers write too: re-measure before deleting anything.
+        entries = []
+        for current, _, files in os.walk(root):
+            for name in files:
+                path = os.path.join(current, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        target = int(max_bytes * 0.9)
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        _cache_bytes = total
+        return removed
+
+
+def get_thumbnail(source_path: str, width: int) -> Optional[str]:
+    """Path of the cached thumbnail for ``source_path``, generating it on a miss."""
+    cache_root = current_app.config.get("STORAGE_CACHE_PATH")
+    if not thumbnails_available() or not cache_root or width not in THUMB_WIDTHS:
+        return None
+    path = thumbnail_path(cache_root, source_key(source_path, width))
+    if os.path.exists(path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+    status, size = render_thumbnail(source_path, path, width, current_app.config.get("THUMB_QUALITY", 80))
+    enforce_limit(cache_root, current_app.config.get("THUMB_CACHE_MAX_BYTES", 0), added=size if status == "written" else 0)
+    return path
+
+
+def build_thumbnails(
+    sources: Iterable[str],
+    cache_root: str,
+    widths: Iterable[int] = THUMB_WIDTHS,
+    quality: int = 80,
+    max_bytes: int = 0,
+    workers: int = 2,
+) -> Dict[str, int]:
+    """Pre-generate thumbnails for ``sources`` across a process pool."""
+    if not thumbnails_available():
+        raise RuntimeError("Pillow with WebP support is required for thumbnails")
+    jobs = []
+    for source in sources:
+        for width in widths:
+            try:
+                jobs.append((source, thumbnail_path(cache_root, source_key(source, width)), width))
+            except OSError:
+                continue
+    stats = {"thumbnails": len(jobs), "written": 0, "fresh": 0, "errors": 0, "bytes_written": 0}
+    if not jobs:
+        return stats
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+        futures = [pool.submit(render_thumbnail, source, target, width, quality) for source, target, width in jobs]
+        for future in futures:
+            try:
+                status, size = future.result()
+            except Exception:
+                stats["errors"] += 1
+                continue
+            stats[status] += 1
+            if status == "written":
+                stats["bytes_written"] += size
+    enforce_limit(cache_root, max_bytes, added=stats["bytes_written"])
+    return stats
+
+
+def cover_relpath(image_path: Optional[str]) -> Optional[str]:
+    if not image_path or not image_path.startswith(STORAGE_PREFIX):
+        return None
+    return image_path[len(STORAGE_PREFIX):]
+
+
+def source_version(relpath: str) -> Optional[str]:
+    """Short tag of the stored cover's mtime, so a replaced cover gets a new URL.
+
+    Thumbnails are served as immutable; without this a client would keep
+    the old image even though the server already renders the new one.
+    """
+    base_path = current_app.config.get("STORAGE_MANGA_PATH")
+    if not base_path:
+        return None
+    try:
+        mtime_ns = os.stat(os.path.join(base_path, *relpath.split("/"))).st_mtime_ns
+    except OSError:
+        return None
+    return format(mtime_ns, "x")
+
+
+def thumb_url(image_path: Optional[str], width: int, version: Optional[str] = None) -> Optional[str]:
+    """Template helper: the thumbnail URL for a stored cover, else the cover itself."""
+    relpath = cover_relpath(image_path)
+    if relpath is None or width not in THUMB_WIDTHS:
+        return image_path
+    return url_for("storage.serve_thumbnail", width=width, relpath=relpath, v=version or source_version(relpath))
+
+
+def thumb_srcset(image_path: Optional[str]) -> str:
+    relpath = cover_relpath(image_path)
+    if relpath is None:
+        return ""
+    version = source_version(relpath)
+    return ", ".join(f"{thumb_url(image_path, w, version)} {w}w" for w in THUMB_WIDTHS)
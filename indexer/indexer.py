@@ -5,11 +5,15 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Set
 
-from app import create_app
+from app import create_app, db
 from flask import current_app
 from app.models.manga import Manga
 from app.models.chapter import Chapter
 from app.models.page import Page
+from app.services.image_variants import manga_by_popularity, page_files_for_manga
+from app.services.manga_search import rebuild_search_index, search_enabled
+from app.services.response_cache import bump_generation
+from app.services.thumbnails import build_thumbnails, cover_relpath
 from app.services.storage_indexer import (
     index_storage,
     _collect_fs_state,
@@ -119,12 +123,97 @@ def _compute_diff_stats_for_slug(base_path: str, slug: str) -> Tuple[Dict[str, i
     return stats, [slug] if slug_in_fs else [], partial
 
 
+def sync_slug(base_path: str, run_logs_path: str, slug: str, start_time: Optional[datetime] = None) -> Dict[str, int]:
+    start_time = start_time or datetime.now()
+    root = Path(base_path)
+    fs_state, fs_slugs, partial, chapters_count, pages_count = _collect_fs_state(root)
+    stats = {
+        "manga": 1 if slug in fs_slugs else 0,
+        "chapters": sum(len(fs_state.get(slug, {})) for _ in [0]) if slug in fs_slugs else 0,
+        "pages": sum(len(v[1]) for v in fs_state.get(slug, {}).values()) if slug in fs_slugs else 0,
+        "added_manga": 0,
+        "added_chapters": 0,
+        "removed_manga": 0,
+        "removed_chapters": 0,
+        "pages_added": 0,
+    }
+    title = _humanize_title_from_slug(slug)
+    m = Manga.query.filter_by(title=title).first()
+    if slug not in fs_slugs and m:
+        removed = _remove_manga(m)
+        stats["removed_manga"] += 1
+        stats["removed_chapters"] += removed
+        _write_indexer_log(run_logs_path, "success", stats, start_time, error=None, processed_slugs=[slug], files_written=0, chapter_range=None)
+    else:
+        chapters_map = fs_state.get(slug, {})
+        _synch_manga(slug, chapters_map, stats)
+        status = "success" if not partial else "partial"
+        _write_indexer_log(run_logs_path, status, stats, start_time, error=None if status == "success" else "Some entries skipped", processed_slugs=[slug], files_written=stats.get("pages_added", 0), chapter_range=None)
+    bump_generation()
+    return stats
+
+
+def build_variants(base_path: str, formats: List[str], quality: Optional[int] = None, max_width: Optional[int] = None, limit: Optional[int] = None, verbose: bool = False) -> Dict[str, int]:
+    # Most popular manga first, so the pages readers actually load get their
+    # smaller variants before the long tail. Already up-to-date variants are
+    # skipped, which makes re-running the job cheap.
+    from scraper.variants import reencode_available, reencode_images
+
+    formats = [fmt for fmt in formats if reencode_available(fmt)]
+    if not formats:
+        raise RuntimeError("Pillow with WebP/AVIF support is required for --variants")
+    totals = {"manga": 0, "images": 0, "variants_written": 0, "variants_fresh": 0, "kept_original": 0, "errors": 0, "saved_bytes": 0}
+    for manga in manga_by_popularity(limit):
+        files = page_files_for_manga(base_path, manga.id)
+        if not files:
+            continue
+        totals["manga"] += 1
+        for fmt in formats:
+            result = reencode_images(files, fmt=fmt, quality=quality, max_width=max_width)
+            for key in ("images", "variants_written", "variants_fresh", "kept_original", "errors", "saved_bytes"):
+                totals[key] += result[key]
+            if verbose:
+                sys.stdout.write(f"{manga.title} [{fmt}]: {result['variants_written']} written, {result['saved_bytes']} bytes saved" + os.linesep)
+    return totals
+
+
+def build_cover_thumbnails(base_path: str, limit: Optional[int] = None, verbose: bool = False) -> Dict[str, int]:
+    # Lazily generated thumbnails make the first catalog view after an index
+    # run slow; pre-warming the most popular covers avoids that.
+    sources = []
+    for manga in manga_by_popularity(limit):
+        relpath = cover_relpath(manga.cover_path)
+        if relpath is None:
+            continue
+        full_path = os.path.join(base_path, *relpath.split("/"))
+        if os.path.isfile(full_path):
+            sources.append(full_path)
+    totals = build_thumbnails(
+        sources,
+        current_app.config.get("STORAGE_CACHE_PATH"),
+        quality=current_app.config.get("THUMB_QUALITY", 80),
+        max_bytes=current_app.config.get("THUMB_CACHE_MAX_BYTES", 0),
+        workers=os.cpu_count() or 2,
+    )
+    totals["covers"] = len(sources)
+    if verbose:
+        sys.stdout.write(f"{len(sources)} covers: {totals['written']} thumbnails written, {totals['fresh']} already cached" + os.linesep)
+    return totals
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run filesystem-to-DB indexer independently.")
     parser.add_argument("--manga-slug", help="Synchronize only the specified manga slug.")
     parser.add_argument("--all", action="store_true", help="Synchronize entire filesystem.")
     parser.add_argument("--dry-run", action="store_true", help="Only compute and log diffs; do not modify DB.")
     parser.add_argument("--verbose", action="store_true", help="Print detailed output.")
+    parser.add_argument("--variants", action="store_true", help="Generate smaller page variants for Accept negotiation, most popular manga first.")
+    parser.add_argument("--variant-formats", default="webp,avif", help="Comma-separated variant formats for --variants. Default: webp,avif")
+    parser.add_argument("--quality", type=int, default=None, help="Encoder quality for --variants (0-100).")
+    parser.add_argument("--max-width", type=int, default=None, help="Downscale --variants wider than this many pixels.")
+    parser.add_argument("--limit", type=int, default=None, help="Only process the N most popular manga with --variants or --thumbnails.")
+    parser.add_argument("--thumbnails", action="store_true", help="Pre-generate cover thumbnails, most popular manga first.")
+    parser.add_argument("--rebuild-search", action="store_true", help="Rebuild the full-text search index from the manga table.")
     return parser.parse_args()
 
 
@@ -135,7 +224,21 @@ def main() -> None:
         base = current_app.config.get("STORAGE_MANGA_PATH")
         logs = current_app.config.get("STORAGE_RUN_LOGS_PATH")
         start_time = datetime.now()
-        if args.dry_run:
+        if args.rebuild_search:
+            if not search_enabled():
+                sys.stdout.write("Full-text search is unavailable on this database" + os.linesep)
+                raise SystemExit(2)
+            count = rebuild_search_index()
+            db.session.commit()
+            sys.stdout.write(f"Indexed {count} manga for search" + os.linesep)
+        elif args.thumbnails:
+            totals = build_cover_thumbnails(base, limit=args.limit, verbose=args.verbose)
+            sys.stdout.write(str(totals) + os.linesep)
+        elif args.variants:
+            formats = [f.strip().lower() for f in args.variant_formats.split(",") if f.strip()]
+            totals = build_variants(base, formats, quality=args.quality, max_width=args.max_width, limit=args.limit, verbose=args.verbose)
+            sys.stdout.write(str(totals) + os.linesep)
+        elif args.dry_run:
             if args.manga_slug:
                 stats, slugs, partial = _compute_diff_stats_for_slug(base, args.manga_slug)
                 status = "success" if not partial else "partial"
@@ -153,35 +256,9 @@ def main() -> None:
                 raise SystemExit(2)
         else:
             if args.manga_slug:
-                root = Path(base)
-                fs_state, fs_slugs, partial, chapters_count, pages_count = _collect_fs_state(root)
-                stats = {
-                    "manga": 1 if args.manga_slug in fs_slugs else 0,
-                    "chapters": sum(len(fs_state.get(args.manga_slug, {})) for _ in [0]) if args.manga_slug in fs_slugs else 0,
-                    "pages": sum(len(v[1]) for v in fs_state.get(args.manga_slug, {}).values()) if args.manga_slug in fs_slugs else 0,
-                    "added_manga": 0,
-                    "added_chapters": 0,
-                    "removed_manga": 0,
-                    "removed_chapters": 0,
-                    "pages_added": 0,
-                }
-                title = _humanize_title_from_slug(args.manga_slug)
-                m = Manga.query.filter_by(title=title).first()
-                if args.manga_slug not in fs_slugs and m:
-                    removed = _remove_manga(m)
-                    stats["removed_manga"] += 1
-                    stats["removed_chapters"] += removed
-                    status = "success"
-                    _write_indexer_log(logs, status, stats, start_time, error=None, processed_slugs=[args.manga_slug], files_written=0, chapter_range=None)
-                    if args.verbose:
-                        sys.stdout.write(str(stats) + os.linesep)
-                else:
-                    chapters_map = fs_state.get(args.manga_slug, {})
-                    _synch_manga(args.manga_slug, chapters_map, stats)
-                    status = "success" if not partial else "partial"
-                    _write_indexer_log(logs, status, stats, start_time, error=None if status == "success" else "Some entries skipped", processed_slugs=[args.manga_slug], files_written=stats.get("pages_added", 0), chapter_range=None)
-                    if args.verbose:
-                        sys.stdout.write(str(stats) + os.linesep)
+                stats = sync_slug(base, logs, args.manga_slug, start_time)
+                if args.verbose:
+                    sys.stdout.write(str(stats) + os.linesep)
             elif args.all:
                 result = index_storage(base, run_logs_path=logs, force=True)
                 if args.verbose:
@@ -0,0 +1,6 @@
+# Allows ``python -m scraper`` (and ``python -m scraper batch jobs.json``).
+
+from .scraper import main
+
+
+main()
@@ -0,0 +1,227 @@
+# Batch mode: scrape many manga from a job file across a pool of worker processes.
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from . import config
+from .logger import RunLogger
+from .metrics import RunMetrics
+from .ratelimit import split_host_budget
+
+
+def parse_batch_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="scraper batch",
+        description="Scrape every manga listed in a JSON job file.",
+    )
+    parser.add_argument("jobs_file", help="Path to a JSON list of scrape jobs.")
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=config.BATCH_WORKERS,
+        help=f"Maximum number of jobs running at once. Default: {config.BATCH_WORKERS}",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=config.BATCH_RETRIES,
+        help=f"Extra passes over failed jobs after the first round. Default: {config.BATCH_RETRIES}",
+    )
+    parser.add_argument(
+        "--resume",
+        "-r",
+        action="store_true",
+        help="Enable --resume for every job.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Bypass the on-disk HTML cache for every job.",
+    )
+    return parser.parse_args(argv)
+
+
+def _as_csv(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return ",".join(str(v).strip() for v in value if str(v).strip())
+    return str(value or "").strip()
+
+
+def job_to_argv(job: Dict[str, Any], resume: bool = False, no_cache: bool = False) -> List[str]:
+    start_url = job.get("start_url")
+    manga_url = job.get("manga_url") or start_url
+    argv = [
+        "--manga-name", str(job.get("manga_name") or ""),
+        "--formats", _as_csv(job.get("formats")) or "jpg",
+    ]
+    if manga_url:
+        argv += ["--manga-url", str(manga_url)]
+    if job.get("series_url"):
+        argv += ["--series-url", str(job["series_url"])]
+    if start_url and job.get("chapters"):
+        argv += ["--start-url", str(start_url), "--chapters", str(int(job["chapters"]))]
+    if job.get("img_class"):
+        argv += ["--img-class", str(job["img_class"])]
+    fallback = _as_csv(job.get("fallback_classes"))
+    if fallback:
+        argv += ["--fallback-classes", fallback]
+    if resume or job.get("resume"):
+        argv.append("--resume")
+    if no_cache or job.get("no_cache"):
+        argv.append("--no-cache")
+    if job.get("webp"):
+        argv.append("--webp")
+        if job.get("webp_quality") is not None:
+            argv += ["--webp-quality", str(int(job["webp_quality"]))]
+        if job.get("max_width"):
+            argv += ["--max-width", str(int(job["max_width"]))]
+    if job.get("index"):
+        argv.append("--index")
+    return argv
+
+
+def load_jobs(jobs_path: str) -> List[Dict[str, Any]]:
+    with open(jobs_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("jobs")
+    if not isinstance(data, list):
+        raise ValueError("Job file must contain a list of jobs (or an object with a 'jobs' list).")
+    jobs: List[Dict[str, Any]] = []
+    for index, job in enumerate(data):
+        if not isinstance(job, dict):
+            raise ValueError(f"Job #{index} is not an object.")
+        if not job.get("manga_name") or not (job.get("start_url") or job.get("manga_url") or job.get("series_url")):
+            raise ValueError(f"Job #{index} needs 'manga_name' and 'start_url' or 'series_url'.")
+        jobs.append(job)
+    return jobs
+
+
+def _run_job(index: int, argv: List[str]) -> Dict[str, Any]:
+    from . import scraper
+
+    result: Dict[str, Any] = {"index": index, "status": "failed", "error": None}
+    # Workers are reused: never report a previous job's logger as this one's.
+    scraper.LAST_LOGGER = None
+    try:
+        output_dir, logger = scraper.run_scrape(scraper.parse_args(argv))
+    except (Exception, KeyboardInterrupt) as exc:
+        result["error"] = str(exc) or exc.__class__.__name__
+        if scraper.LAST_LOGGER is not None:
+            result["metrics"] = scraper.LAST_LOGGER.metrics_snapshot()
+        return result
+    result.update({
+        "status": logger.status,
+        "run_id": logger.run_id,
+        "log_file": logger.filename,
+        "output_dir": output_dir,
+        "stats": dict(logger.stats),
+        "files_written": logger.files_written,
+        "reused_files": logger.reused_files,
+        "downloaded_chapters": list(logger.downloaded_chapters),
+        "skipped_chapters": list(logger.skipped_chapters),
+        "metrics": logger.metrics_snapshot(),
+    })
+    return result
+
+
+def run_batch(jobs: List[Dict[str, Any]], workers: int, retries: int = 0, resume: bool = False, no_cache: bool = False) -> RunLogger:
+    summary = RunLogger(component="scraper", run_type="batch", chapter_count=None)
+    summary.resume_enabled = resume
+    states: List[Dict[str, Any]] = [
+        {"manga_name": job.get("manga_name"), "start_url": job.get("start_url") or job.get("manga_url") or job.get("series_url"), "attempts": 0, "status": "pending", "error": None}
+        for job in jobs
+    ]
+    summary.jobs = states
+    summary.metrics = RunMetrics()
+    summary._write()
+
+    workers = max(1, int(workers))
+    to_run = list(range(len(jobs)))
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=split_host_budget, initargs=(workers,)) as pool:
+            for round_number in range(max(0, int(retries)) + 1):
+                if not to_run:
+                    break
+                # Retries resume so chapters finished in the failed attempt are kept.
+                futures = {
+                    pool.submit(_run_job, i, job_to_argv(jobs[i], resume=resume or round_number > 0, no_cache=no_cache)): i
+                    for i in to_run
+                }
+                failed: List[int] = []
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        result = future.result()
+                    except Exception as exc:
+                        result = {"status": "failed", "error": str(exc)}
+                    state = states[i]
+                    state["attempts"] += 1
+                    state["status"] = result.get("status")
+                    state["error"] = result.get("error")
+                    # Failed attempts still spent bandwidth and time, so count them.
+                    summary.metrics.merge_dict(result.get("metrics"))
+                    for key in ("run_id", "log_file", "downloaded_chapters", "skipped_chapters"):
+                        if key in result:
+                            state[key] = result[key]
+                    if result.get("status") == "success":
+                        stats = result.get("stats") or {}
+                        summary.update_stats(
+                            manga=stats.get("manga", 0),
+                            chapters=stats.get("chapters", 0),
+                            pages=stats.get("pages", 0),
+                        )
+                        summary.add_files_written(result.get("files_written", 0))
+                        summary.reused_files += int(result.get("reused_files") or 0)
+                    else:
+                        failed.append(i)
+                    summary._write()
+                to_run = sorted(failed)
+    except KeyboardInterrupt:
+        summary.mark_interrupted("Interrupted by user")
+        raise
+
+    succeeded = sum(1 for state in states if state["status"] == "success")
+    if succeeded == len(states):
+        summary.finish("success")
+    elif succeeded:
+        summary.error = f"{len(states) - succeeded} of {len(states)} jobs failed"
+        summary.finish("partial")
+    else:
+        summary.fail("All jobs failed")
+    return summary
+
+
+def batch_main(argv: Optional[List[str]] = None) -> None:
+    args = parse_batch_args(argv)
+    try:
+        jobs = load_jobs(args.jobs_file)
+    except (OSError, ValueError) as exc:
+        raise SystemExit(f"Invalid job file: {exc}") from exc
+
+    from .scraper import parse_args
+
+    for index, job in enumerate(jobs):
+        try:
+            parse_args(job_to_argv(job))
+        except SystemExit as exc:
+            raise SystemExit(f"Invalid job #{index} ({job.get('manga_name')})") from exc
+
+    try:
+        summary = run_batch(jobs, args.workers, retries=args.retries, resume=args.resume, no_cache=args.no_cache)
+    except KeyboardInterrupt:
+        raise SystemExit(130)
+
+    for state in summary.jobs or []:
+        line = f"[{state['status']}] {state['manga_name']}"
+        if state.get("error"):
+            line += f": {state['error']}"
+        sys.stdout.write(line + os.linesep)
+    if summary.status == "failed":
+        raise SystemExit(1)
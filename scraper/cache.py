@@ -0,0 +1,133 @@
+# On-disk HTML response cache with conditional revalidation for the scraper.
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from . import config
+
+
+class HtmlCache:
+    """URL-keyed HTML bodies plus their ETag / Last-Modified validators.
+
+    Each entry is one JSON file named after the URL hash. The file mtime is
+    bumped on every hit, so eviction simply drops the oldest files until the
+    directory fits in ``max_bytes`` again.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max(0, int(max_bytes))
+        self._sizes: Optional[Dict[str, int]] = None
+        self._lock = threading.Lock()
+
+    def _entry_path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.json")
+
+    def _load_sizes(self) -> Dict[str, int]:
+        if self._sizes is None:
+            sizes: Dict[str, int] = {}
+            try:
+                for entry in os.scandir(self.path):
+                    if entry.is_file() and entry.name.endswith(".json"):
+                        sizes[entry.path] = entry.stat().st_size
+            except OSError:
+                pass
+            self._sizes = sizes
+        return self._sizes
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._entry_path(url), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("url") != url or not isinstance(data.get("body"), str):
+            return None
+        return data
+
+    def touch(self, url: str) -> None:
+        try:
+            os.utime(self._entry_path(url), None)
+        except OSError:
+            pass
+
+    def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        entry_path = self._entry_path(url)
+        payload = json.dumps({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+            "body": body,
+        })
+        if self.max_bytes and len(payload) > self.max_bytes:
+            return
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                os.makedirs(self.path, exist_ok=True)
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(payload)
+                os.replace(tmp_path, entry_path)
+            except OSError:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+                return
+            self._load_sizes()[entry_path] = len(payload.encode("utf-8"))
+            self._evict()
+
+    def _evict(self) -> None:
+        sizes = self._load_sizes()
+        total = sum(sizes.values())
+        if not self.max_bytes or total <= self.max_bytes:
+            return
+        by_age: list = []
+        for entry_path in list(sizes):
+            try:
+                by_age.append((os.path.getmtime(entry_path), entry_path))
+            except OSError:
+                sizes.pop(entry_path, None)
+        by_age.sort()
+        total = sum(sizes.values())
+        for _, entry_path in by_age:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(entry_path)
+            except OSError:
+                pass
+            total -= sizes.pop(entry_path, 0)
+
+    @staticmethod
+    def conditional_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+
+_CACHE: Optional[HtmlCache] = None
+_CACHE_ENABLED: bool = config.HTML_CACHE_ENABLED
+
+
+def configure_html_cache(enabled: bool) -> None:
+    global _CACHE_ENABLED
+    _CACHE_ENABLED = bool(enabled)
+
+
+def get_html_cache() -> Optional[HtmlCache]:
+    global _CACHE
+    if not _CACHE_ENABLED:
+        return None
+    if _CACHE is None:
+        _CACHE = HtmlCache(config.HTML_CACHE_PATH, config.HTML_CACHE_MAX_BYTES)
+    return _CACHE
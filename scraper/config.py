@@ -22,3 +22,54 @@ RUN_LOGS_PATH = os.environ.get(
     os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage", "run_logs"),
 )
 
+
+# Per-host request pacing: sustained requests per second and burst size of the
+# token bucket shared by every fetch in a run.
+HOST_RATE_PER_SEC = float(os.environ.get("SCRAPER_HOST_RATE_PER_SEC", "2"))
+
+HOST_BURST = int(os.environ.get("SCRAPER_HOST_BURST", "4"))
+
+# Adaptive concurrency bounds per host; the limiter moves between them based on
+# observed error rate and latency.
+HOST_MAX_CONCURRENCY = int(os.environ.get("SCRAPER_HOST_MAX_CONCURRENCY", "4"))
+
+HOST_MIN_CONCURRENCY = int(os.environ.get("SCRAPER_HOST_MIN_CONCURRENCY", "1"))
+
+# Latency (seconds) above which a host is considered degraded.
+HOST_LATENCY_TARGET = float(os.environ.get("SCRAPER_HOST_LATENCY_TARGET", "3"))
+
+# Exponential backoff between retries: base * 2 ** (attempt - 1), capped, with
+# full jitter. Retry-After from the server takes precedence.
+BACKOFF_BASE = float(os.environ.get("SCRAPER_BACKOFF_BASE", "0.5"))
+
+BACKOFF_MAX = float(os.environ.get("SCRAPER_BACKOFF_MAX", "30"))
+
+# On-disk cache of chapter HTML keyed by URL, revalidated with ETag /
+# Last-Modified on repeat runs. Least recently used entries are evicted once
+# the directory grows past HTML_CACHE_MAX_BYTES.
+HTML_CACHE_ENABLED = os.environ.get("SCRAPER_HTML_CACHE_ENABLED", "1") not in ("0", "false", "no")
+
+HTML_CACHE_PATH = os.environ.get(
+    "SCRAPER_HTML_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "storage", "html_cache"),
+)
+
+HTML_CACHE_MAX_BYTES = int(os.environ.get("SCRAPER_HTML_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Worker processes used by ``scraper batch``; this is the global cap on how
+# many manga are scraped at once. Failed jobs get BATCH_RETRIES more passes
+# after the first round finishes.
+BATCH_WORKERS = int(os.environ.get("SCRAPER_BATCH_WORKERS", "4"))
+
+BATCH_RETRIES = int(os.environ.get("SCRAPER_BATCH_RETRIES", "1"))
+
+# Seconds to wait for the slug-scoped indexer started by ``--index``.
+INDEXER_TIMEOUT = float(os.environ.get("SCRAPER_INDEXER_TIMEOUT", "600"))
+
+# Optional re-encoding of stored pages into smaller WebP variants (needs
+# Pillow). REENCODE_MAX_WIDTH of 0 keeps the original width.
+REENCODE_QUALITY = int(os.environ.get("SCRAPER_REENCODE_QUALITY", "80"))
+
+REENCODE_MAX_WIDTH = int(os.environ.get("SCRAPER_REENCODE_MAX_WIDTH", "0"))
+
+REENCODE_WORKERS = int(os.environ.get("SCRAPER_REENCODE_WORKERS", str(os.cpu_count() or 2)))
@@ -0,0 +1,136 @@
+# Chapter discovery from a series index page, diffed against what is already on disk.
+
+import os
+import re
+from typing import Dict, List, Optional, Set, Tuple, Union
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from . import config
+from .manifest import MANIFEST_FILENAME, load_slug_manifests, manifest_is_complete
+
+
+# Tried in order; the first selector that matches any link wins. Madara
+# (WordPress manga theme) sites use the first one.
+CHAPTER_LINK_SELECTORS = (
+    "li.wp-manga-chapter a",
+    "ul.main.version-chap a",
+    ".chapter-list a",
+    "ul.chapters a",
+)
+
+_LABELLED_NUMBER = re.compile(
+    r"(?:chapter|chap|ch|b[oö]l[uü]m)[\s._-]*(\d+)(?:[._-](\d+))?",
+    re.IGNORECASE,
+)
+_PLAIN_NUMBER = re.compile(r"(\d+)(?:\.(\d+))?")
+
+
+def normalize_chapter_number(whole: str, fraction: Optional[str] = None) -> str:
+    number = str(int(whole))
+    fraction = (fraction or "").rstrip("0")
+    return f"{number}.{fraction}" if fraction else number
+
+
+def parse_chapter_number(text: str) -> Optional[str]:
+    """Chapter number in ``text`` as a normalized string ("12", "12.5").
+
+    A number right after a chapter label ("Chapter 12.5", "chapter-12-5",
+    "Bölüm 12") is preferred; otherwise the last number in the text is used.
+    """
+    if not text:
+        return None
+    labelled = _LABELLED_NUMBER.findall(text)
+    if labelled:
+        whole, fraction = labelled[-1]
+        return normalize_chapter_number(whole, fraction)
+    plain = _PLAIN_NUMBER.findall(text)
+    if plain:
+        whole, fraction = plain[-1]
+        return normalize_chapter_number(whole, fraction)
+    return None
+
+
+def chapter_sort_key(number: str) -> Tuple[int, int]:
+    whole, _, fraction = number.partition(".")
+    return int(whole), int(fraction or 0)
+
+
+def chapter_log_value(number: Optional[str]) -> Optional[Union[int, float]]:
+    # Run logs keep integer chapters as ints so existing consumers are unaffected.
+    if not number:
+        return None
+    return int(number) if "." not in number else float(number)
+
+
+def extract_chapter_links(page: BeautifulSoup, base_url: str) -> List[Tuple[str, str]]:
+    """(url, number) for every chapter linked from a series page, oldest first."""
+    links = []
+    for selector in CHAPTER_LINK_SELECTORS:
+        links = page.select(selector)
+        if links:
+            break
+    host = urlparse(base_url).netloc
+    found: Dict[str, str] = {}
+    for link in links:
+        href = (link.get("href") or "").strip()
+        if not href or href.startswith(("#", "javascript:")):
+            continue
+        url = urljoin(base_url, href)
+        if urlparse(url).netloc != host or url in found:
+            continue
+        segments = [s for s in urlparse(url).path.split("/") if s]
+        number = parse_chapter_number(link.get_text(" ", strip=True)) or parse_chapter_number(segments[-1] if segments else "")
+        if number is None:
+            continue
+        found[url] = number
+    chapters = sorted(found.items(), key=lambda item: chapter_sort_key(item[1]))
+    # Keep one URL per number; index pages sometimes list a chapter twice.
+    unique: List[Tuple[str, str]] = []
+    seen: Set[str] = set()
+    for url, number in chapters:
+        if number in seen:
+            continue
+        seen.add(number)
+        unique.append((url, number))
+    return unique
+
+
+def stored_chapters(manga_slug: str) -> Tuple[Set[str], Set[str]]:
+    """Source URLs and chapter numbers already complete under the slug directory."""
+    slug_dir = os.path.join(config.BASE_STORAGE_PATH, manga_slug)
+    urls: Set[str] = set()
+    numbers: Set[str] = set()
+    complete_dirs: Set[str] = set()
+    for source_url, (dir_name, manifest) in load_slug_manifests(manga_slug).items():
+        if manifest_is_complete(os.path.join(slug_dir, dir_name), manifest):
+            urls.add(source_url)
+            complete_dirs.add(dir_name)
+    try:
+        entries = list(os.scandir(slug_dir))
+    except OSError:
+        return urls, numbers
+    for entry in entries:
+        if not entry.is_dir() or entry.name.startswith("."):
+            continue
+        try:
+            files = os.listdir(entry.path)
+        except OSError:
+            continue
+        if MANIFEST_FILENAME in files:
+            if entry.name not in complete_dirs:
+                continue
+        # Directories scraped before manifests existed still count when they
+        # hold images and no interrupted download.
+        elif any(name.endswith(".part") for name in files) or not any(not name.startswith(".") for name in files):
+            continue
+        number = parse_chapter_number(entry.name)
+        if number is not None:
+            numbers.add(number)
+    return urls, numbers
+
+
+def missing_chapters(chapters: List[Tuple[str, str]], manga_slug: str) -> List[Tuple[str, str]]:
+    urls, numbers = stored_chapters(manga_slug)
+    return [(url, number) for url, number in chapters if url not in urls and number not in numbers]
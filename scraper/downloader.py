@@ -1,72 +1,255 @@
 # Download and persistence helpers for the standalone manga scraper.
 
+import hashlib
 import os
-from typing import Optional
+import time
+from typing import Any, Optional, Tuple
 
 import requests
 
 from . import config
+from .cache import HtmlCache, get_html_cache
+from .integrity import StreamValidator
+from .metrics import get_run_metrics
+from .ratelimit import RETRYABLE_STATUS_CODES, backoff_delay, get_rate_limiter, parse_retry_after
 
 
 class DownloadError(Exception):
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.integrity_failures = 0
+
+
+class ImageIntegrityError(DownloadError):
     pass
 
 
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, DownloadError):
+        return exc.status_code is None or exc.status_code in RETRYABLE_STATUS_CODES
+    return True
+
+
+def _sleep_before_retry(url: str, attempt: int, exc: Exception) -> None:
+    if attempt >= config.MAX_RETRIES:
+        return
+    get_run_metrics().record_retry(url)
+    retry_after = exc.retry_after if isinstance(exc, DownloadError) else None
+    time.sleep(backoff_delay(attempt, retry_after))
+
+
 def fetch_html(url: str) -> str:
     headers = {"User-Agent": config.USER_AGENT}
+    cache = get_html_cache()
+    cached = cache.get(url) if cache is not None else None
+    if cached is not None:
+        headers.update(HtmlCache.conditional_headers(cached))
+    limiter = get_rate_limiter()
     attempt = 0
     last_error: Optional[Exception] = None
 
     while attempt < config.MAX_RETRIES:
         attempt += 1
+        status_code: Optional[int] = None
+        retry_after: Optional[float] = None
+        received = 0
+        limiter.acquire(url)
+        started = time.monotonic()
         try:
             response = requests.get(
                 url,
                 headers=headers,
                 timeout=config.REQUEST_TIMEOUT,
             )
-            if response.status_code != 200:
+            status_code = response.status_code
+            if status_code == 304 and cached is not None:
+                cache.touch(url)
+                return cached["body"]
+            if status_code != 200:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
                 raise DownloadError(
-                    f"Unexpected status code {response.status_code} for URL: {url}"
+                    f"Unexpected status code {status_code} for URL: {url}",
+                    status_code=status_code,
+                    retry_after=retry_after,
                 )
+            received = len(response.content)
             response.encoding = response.apparent_encoding or response.encoding
-            return response.text
+            body = response.text
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if cache is not None and (etag or last_modified):
+                cache.put(url, body, etag, last_modified)
+            return body
         except Exception as exc:
             last_error = exc
+            if not _is_retryable(exc):
+                raise
+        finally:
+            latency = time.monotonic() - started
+            limiter.release(url, status_code, latency, retry_after)
+            get_run_metrics().record_request("html", latency, received)
+        _sleep_before_retry(url, attempt, last_error)
+
+    raise DownloadError(
+        f"Failed to fetch HTML after {config.MAX_RETRIES} attempts: {last_error}",
+        status_code=getattr(last_error, "status_code", None),
+    )
+
+
+def _content_range_total(value: Optional[str]) -> Optional[int]:
+    # "bytes 100-199/200" or "bytes */200"
+    if not value or "/" not in value:
+        return None
+    total = value.rsplit("/", 1)[1].strip()
+    return int(total) if total.isdigit() else None
 
-    raise DownloadError(f"Failed to fetch HTML after {config.MAX_RETRIES} attempts: {last_error}")
 
+def _content_range_start(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    spec = value.strip()
+    if spec.lower().startswith("bytes "):
+        spec = spec[6:]
+    start = spec.split("-", 1)[0].strip()
+    return int(start) if start.isdigit() else None
 
-def download_image(url: str, destination_path: str) -> None:
+
+def _expected_length(response: requests.Response) -> Optional[int]:
+    # With a transfer encoding the header counts compressed bytes, not what
+    # iter_content yields, so it cannot be compared against the file size.
+    encoding = (response.headers.get("Content-Encoding") or "identity").strip().lower()
+    if encoding != "identity":
+        return None
+    value = (response.headers.get("Content-Length") or "").strip()
+    return int(value) if value.isdigit() else None
+
+
+def _hash_prefix(path: str, length: int) -> Any:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        remaining = length
+        while remaining > 0:
+            block = f.read(min(65536, remaining))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+def download_image(url: str, destination_path: str) -> Tuple[int, str, int]:
+    """Download ``url`` to ``destination_path``.
+
+    Returns the final size, its SHA-256 and how many attempts were rejected
+    by the integrity check. Bytes are streamed into ``<destination>.part``
+    and validated on the fly (magic bytes, announced length, end marker);
+    the file is renamed into place only once it passes, so an existing
+    destination is always a complete image. A leftover ``.part`` from an
+    interrupted run is resumed with a Range request.
+    """
     headers = {"User-Agent": config.USER_AGENT}
+    limiter = get_rate_limiter()
     attempt = 0
+    integrity_failures = 0
     last_error: Optional[Exception] = None
+    part_path = f"{destination_path}.part"
 
     os.makedirs(os.path.dirname(destination_path), exist_ok=True)
 
     while attempt < config.MAX_RETRIES:
         attempt += 1
+        status_code: Optional[int] = None
+        retry_after: Optional[float] = None
+        offset = os.path.getsize(part_path) if os.path.isfile(part_path) else 0
+        received = 0
+        request_headers = dict(headers)
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+        limiter.acquire(url)
+        started = time.monotonic()
         try:
             with requests.get(
                 url,
-                headers=headers,
+                headers=request_headers,
                 timeout=config.REQUEST_TIMEOUT,
                 stream=True,
             ) as response:
-                if response.status_code != 200:
+                status_code = response.status_code
+                if status_code == 416 and offset:
+                    if _content_range_total(response.headers.get("Content-Range")) == offset:
+                        problem = StreamValidator.from_partial(destination_path, part_path, offset).finish(offset)
+                        if problem is not None:
+                            os.remove(part_path)
+                            raise ImageIntegrityError(f"Invalid image ({problem}) for URL: {url}")
+                        digest = _hash_prefix(part_path, offset)
+                        os.replace(part_path, destination_path)
+                        return offset, digest.hexdigest(), integrity_failures
+                    os.remove(part_path)
+                    raise DownloadError(f"Stale partial download discarded for image URL: {url}")
+                if status_code == 206 and offset:
+                    if _content_range_start(response.headers.get("Content-Range")) != offset:
+                        os.remove(part_path)
+                        raise DownloadError(f"Mismatched Content-Range for image URL: {url}")
+                    expected_total = _content_range_total(response.headers.get("Content-Range"))
+                    digest = _hash_prefix(part_path, offset)
+                    validator = StreamValidator.from_partial(destination_path, part_path, offset)
+                    mode = "ab"
+                elif status_code == 200:
+                    # The server ignored the Range header; start over.
+                    offset = 0
+                    expected_total = _expected_length(response)
+                    digest = hashlib.sha256()
+                    validator = StreamValidator(destination_path)
+                    mode = "wb"
+                else:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
                     raise DownloadError(
-                        f"Unexpected status code {response.status_code} for image URL: {url}"
+                        f"Unexpected status code {status_code} for image URL: {url}",
+                        status_code=status_code,
+                        retry_after=retry_after,
                     )
-                with open(destination_path, "wb") as file_handle:
+                written = offset
+                with open(part_path, mode) as file_handle:
                     for chunk in response.iter_content(chunk_size=8192):
                         if not chunk:
                             continue
                         file_handle.write(chunk)
-            return
+                        digest.update(chunk)
+                        validator.feed(chunk)
+                        written += len(chunk)
+                        received += len(chunk)
+                if expected_total is not None and written < expected_total:
+                    # Short read: keep the .part so the next attempt resumes it.
+                    raise ImageIntegrityError(
+                        f"Incomplete image download ({written} of {expected_total} bytes) for URL: {url}"
+                    )
+                problem = validator.finish(expected_total)
+                if problem is not None:
+                    os.remove(part_path)
+                    raise ImageIntegrityError(f"Invalid image ({problem}) for URL: {url}")
+            os.replace(part_path, destination_path)
+            return written, digest.hexdigest(), integrity_failures
         except Exception as exc:
             last_error = exc
+            if isinstance(exc, ImageIntegrityError):
+                integrity_failures += 1
+            if not isinstance(exc, DownloadError) or isinstance(exc, ImageIntegrityError):
+                # The body was unusable even though the status said otherwise;
+                # count it against the host.
+                status_code = None
+            if not _is_retryable(exc):
+                raise
+        finally:
+            latency = time.monotonic() - started
+            limiter.release(url, status_code, latency, retry_after)
+            get_run_metrics().record_request("image", latency, received)
+        _sleep_before_retry(url, attempt, last_error)
 
-    raise DownloadError(
-        f"Failed to download image after {config.MAX_RETRIES} attempts: {last_error}"
+    error = DownloadError(
+        f"Failed to download image after {config.MAX_RETRIES} attempts: {last_error}",
+        status_code=getattr(last_error, "status_code", None),
     )
-
+    error.integrity_failures = integrity_failures
+    raise error
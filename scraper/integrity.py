@@ -0,0 +1,86 @@
+# Streaming integrity checks for downloaded images (magic bytes, length, end markers).
+
+import os
+import struct
+from typing import Optional
+
+
+_HEAD_BYTES = 16
+_TAIL_BYTES = 32
+
+JPEG_MAGIC = b"\xff\xd8\xff"
+JPEG_END = b"\xff\xd9"
+PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+PNG_END = b"IEND\xaeB`\x82"
+
+_FORMATS_BY_EXT = {
+    ".jpg": "jpeg",
+    ".jpeg": "jpeg",
+    ".png": "png",
+    ".webp": "webp",
+}
+
+
+def detect_format(head: bytes) -> Optional[str]:
+    if head.startswith(JPEG_MAGIC):
+        return "jpeg"
+    if head.startswith(PNG_MAGIC):
+        return "png"
+    if len(head) >= 12 and head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+class StreamValidator:
+    """Validates an image while it streams, keeping only its first and last bytes.
+
+    ``feed`` is called with every chunk as it is written; ``finish`` checks the
+    magic bytes against the file extension, the byte count against the length
+    the server announced and the format's end marker, and returns an error
+    message (or None when the image looks complete).
+    """
+
+    def __init__(self, destination_path: str, head: bytes = b"", tail: bytes = b"", size: int = 0):
+        _, ext = os.path.splitext(destination_path.lower())
+        self.expected_format = _FORMATS_BY_EXT.get(ext)
+        self.head = head[:_HEAD_BYTES]
+        self.tail = tail[-_TAIL_BYTES:]
+        self.size = size
+
+    @classmethod
+    def from_partial(cls, destination_path: str, part_path: str, size: int) -> "StreamValidator":
+        head = b""
+        tail = b""
+        if size:
+            with open(part_path, "rb") as f:
+                head = f.read(_HEAD_BYTES)
+                f.seek(max(0, size - _TAIL_BYTES))
+                tail = f.read(_TAIL_BYTES)
+        return cls(destination_path, head=head, tail=tail, size=size)
+
+    def feed(self, chunk: bytes) -> None:
+        if len(self.head) < _HEAD_BYTES:
+            self.head += chunk[: _HEAD_BYTES - len(self.head)]
+        self.tail = (self.tail + chunk[-_TAIL_BYTES:])[-_TAIL_BYTES:]
+        self.size += len(chunk)
+
+    def finish(self, expected_size: Optional[int] = None) -> Optional[str]:
+        if expected_size is not None and self.size != expected_size:
+            return f"length mismatch ({self.size} of {expected_size} bytes)"
+        actual = detect_format(self.head)
+        if actual is None:
+            return "not an image (unrecognised magic bytes)"
+        if self.expected_format is not None and actual != self.expected_format:
+            return f"content is {actual} but the extension expects {self.expected_format}"
+        if actual == "jpeg":
+            if not self.tail.rstrip(b"\x00\r\n ").endswith(JPEG_END):
+                return "truncated JPEG (missing EOI marker)"
+        elif actual == "png":
+            if PNG_END not in self.tail:
+                return "truncated PNG (missing IEND chunk)"
+        elif actual == "webp":
+            (riff_size,) = struct.unpack("<I", self.head[4:8])
+            declared = riff_size + 8 + (riff_size & 1)
+            if self.size < riff_size + 8 or self.size > declared:
+                return f"truncated WebP (RIFF declares {riff_size + 8} bytes, got {self.size})"
+        return None
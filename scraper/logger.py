@@ -1,11 +1,13 @@
 import json
 import os
+import threading
 import time
 import uuid
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
 from . import config
+from .metrics import RunMetrics
 
 
 class RunLogger:
@@ -30,20 +32,37 @@ class RunLogger:
         self.chapter_range = chapter_range
         self.allowed_formats = allowed_formats or ["jpg"]
         self.indexer_triggered = False
+        self.indexer_duration_sec: Optional[float] = None
+        self.indexer_error: Optional[str] = None
         self.files_written = 0
+        self.reused_files = 0
         self.resume_enabled = False
         self.skipped_chapters: List[int] = []
         self.downloaded_chapters: List[int] = []
+        # Listed on the series page but answered 404/410; skipped, not fatal.
+        self.unavailable_chapters: List[int] = []
         self.interrupted_at: Optional[str] = None
         self.last_completed_chapter: Optional[int] = None
         self.start_time = datetime.now()
-        self.filename = f"{component}_{int(time.time())}.json"
+        # Batch workers start runs within the same second; the run id suffix
+        # keeps their log files apart while preserving time ordering.
+        self.filename = f"{component}_{int(time.time())}_{self.run_id[:8]}.json"
         self.filepath = os.path.join(config.RUN_LOGS_PATH, self.filename)
         self.error: Optional[str] = None
         self.status: str = "running"
         self.stats = {"manga": 0, "chapters": 0, "pages": 0}
+        self.integrity = {"images_checked": 0, "failed_checks": 0, "images_rejected": 0}
         self.fallback_class_used: Optional[str] = None
         self.source_pattern_detected: Optional[str] = None
+        self.jobs: Optional[List[Dict[str, Any]]] = None
+        self.metrics: Optional[RunMetrics] = None
+        self.reencode: Optional[Dict[str, Any]] = None
+        self._shards: Dict[int, Dict[str, Any]] = {}
+        self._shards_lock = threading.Lock()
+        # This process's own collector (e.g. series-page fetches), kept once
+        # merge_shard starts replacing self.metrics with the combined view.
+        self._own_metrics: Optional[RunMetrics] = None
+        self._merging = False
         self._write()
 
     def _to_dict(self) -> Dict[str, Any]:
@@ -62,17 +81,30 @@ class RunLogger:
             "status": self.status,
             "error": self.error,
             "files_written": self.files_written,
+            "reused_files": self.reused_files,
             "indexer_triggered": self.indexer_triggered,
+            "indexer_duration_sec": self.indexer_duration_sec,
+            "indexer_error": self.indexer_error,
             "stats": self.stats,
+            "integrity": self.integrity,
             "resume_enabled": self.resume_enabled,
             "skipped_chapters": self.skipped_chapters,
             "downloaded_chapters": self.downloaded_chapters,
+            "unavailable_chapters": self.unavailable_chapters,
             "interrupted_at": self.interrupted_at,
             "last_completed_chapter": self.last_completed_chapter,
             "fallback_class_used": self.fallback_class_used,
             "source_pattern_detected": self.source_pattern_detected,
+            "jobs": self.jobs,
+            "metrics": self.metrics_snapshot(),
+            "reencode": self.reencode,
         }
 
+    def metrics_snapshot(self) -> Optional[Dict[str, Any]]:
+        if self.metrics is None:
+            return None
+        return self.metrics.to_dict((datetime.now() - self.start_time).total_seconds())
+
     def _write(self):
         try:
             os.makedirs(config.RUN_LOGS_PATH, exist_ok=True)
@@ -86,13 +118,71 @@ class RunLogger:
         self.stats["chapters"] += chapters
         self.stats["pages"] += pages
 
+    def record_integrity(self, checked: int = 0, failed_checks: int = 0, rejected: int = 0):
+        self.integrity["images_checked"] += checked
+        self.integrity["failed_checks"] += failed_checks
+        self.integrity["images_rejected"] += rejected
+
     def add_files_written(self, count: int):
         self.files_written += max(0, int(count))
 
-    def set_indexer_triggered(self, value: bool = True):
+    def set_indexer_triggered(self, value: bool = True, duration_sec: Optional[float] = None, error: Optional[str] = None):
         self.indexer_triggered = bool(value)
+        if duration_sec is not None:
+            self.indexer_duration_sec = round(duration_sec, 3)
+        self.indexer_error = error
         self._write()
 
+    def merge_shard(self, shard_id: int, snapshot: Dict[str, Any]):
+        """Fold the latest snapshot from a --workers shard into this run.
+
+        Shards cover contiguous chapter ranges in order, so the run's
+        last_completed_chapter is the last chapter of the finished prefix:
+        every shard before it succeeded and the first unfinished shard is
+        only counted up to its own last completed chapter.
+        """
+        with self._shards_lock:
+            self._shards[shard_id] = snapshot
+            shards = [self._shards[k] for k in sorted(self._shards)]
+            self.stats = {
+                key: sum(int((s.get("stats") or {}).get(key, 0)) for s in shards)
+                for key in ("manga", "chapters", "pages")
+            }
+            self.integrity = {
+                key: sum(int((s.get("integrity") or {}).get(key, 0)) for s in shards)
+                for key in ("images_checked", "failed_checks", "images_rejected")
+            }
+            self.files_written = sum(int(s.get("files_written") or 0) for s in shards)
+            self.reused_files = sum(int(s.get("reused_files") or 0) for s in shards)
+            if not self._merging:
+                self._own_metrics = self.metrics
+                self._merging = True
+            metrics = RunMetrics()
+            if self._own_metrics is not None:
+                metrics.merge_dict(self._own_metrics.to_dict(0.0))
+            for s in shards:
+                metrics.merge_dict(s.get("metrics"))
+            self.metrics = metrics
+            self.skipped_chapters = sorted({c for s in shards for c in s.get("skipped_chapters") or []})
+            self.downloaded_chapters = sorted({c for s in shards for c in s.get("downloaded_chapters") or []})
+            self.unavailable_chapters = sorted({c for s in shards for c in s.get("unavailable_chapters") or []})
+            for s in shards:
+                if s.get("fallback_class_used"):
+                    self.fallback_class_used = s["fallback_class_used"]
+                if s.get("source_pattern_detected"):
+                    self.source_pattern_detected = s["source_pattern_detected"]
+            last_completed = None
+            for expected_id in range(max(self._shards) + 1):
+                s = self._shards.get(expected_id)
+                if s is None:
+                    break
+                if s.get("last_completed_chapter") is not None:
+                    last_completed = s["last_completed_chapter"]
+                if s.get("status") != "success":
+                    break
+            self.last_completed_chapter = last_completed
+            self._write()
+
     def finish(self, status: str = "success"):
         self.status = status
         self._write()
@@ -107,3 +197,22 @@ class RunLogger:
         self.status = "interrupted"
         self.interrupted_at = datetime.now().isoformat()
         self._write()
+
+
+class ShardRunLogger(RunLogger):
+    """RunLogger stand-in for --workers processes.
+
+    Instead of writing its own run file it sends a snapshot of itself to the
+    parent process, which merges it with ``RunLogger.merge_shard``.
+    """
+
+    def __init__(self, queue, shard_id: int, **kwargs):
+        self._queue = queue
+        self.shard_id = shard_id
+        super().__init__(**kwargs)
+
+    def _write(self):
+        try:
+            self._queue.put((self.shard_id, self._to_dict()))
+        except Exception:
+            pass
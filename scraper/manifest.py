@@ -0,0 +1,83 @@
+# Per-chapter completion manifests written next to downloaded images.
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import config
+
+
+MANIFEST_FILENAME = ".manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(65536), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def manifest_path(chapter_dir: str) -> str:
+    return os.path.join(chapter_dir, MANIFEST_FILENAME)
+
+
+def write_manifest(chapter_dir: str, source_url: str, chapter_number: str, images: List[Dict[str, Any]]) -> None:
+    data = {
+        "version": MANIFEST_VERSION,
+        "source_url": source_url,
+        "chapter_dir": os.path.basename(chapter_dir),
+        "chapter_number": chapter_number,
+        "expected_count": len(images),
+        "completed_at": datetime.now().isoformat(),
+        "images": images,
+    }
+    path = manifest_path(chapter_dir)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_manifest(chapter_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(manifest_path(chapter_dir), "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("images"), list):
+        return None
+    return data
+
+
+def manifest_is_complete(chapter_dir: str, manifest: Dict[str, Any]) -> bool:
+    images = manifest.get("images") or []
+    if not images or len(images) != manifest.get("expected_count"):
+        return False
+    for image in images:
+        try:
+            if os.path.getsize(os.path.join(chapter_dir, image["file"])) != image["size"]:
+                return False
+        except (OSError, KeyError, TypeError):
+            return False
+    return True
+
+
+def load_slug_manifests(manga_slug: str) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """Map each chapter source URL to its directory name and manifest."""
+    result: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    slug_dir = os.path.join(config.BASE_STORAGE_PATH, manga_slug)
+    try:
+        entries = list(os.scandir(slug_dir))
+    except OSError:
+        return result
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        manifest = read_manifest(entry.path)
+        if manifest and manifest.get("source_url"):
+            result[manifest["source_url"]] = (entry.name, manifest)
+    return result
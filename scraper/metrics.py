@@ -0,0 +1,135 @@
+# Throughput, latency and retry metrics collected during a scraper run.
+
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+# Upper bounds (seconds) of the latency histogram buckets; the last bucket
+# is unbounded.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REQUEST_KINDS = ("html", "image")
+
+
+def _bucket_labels() -> List[str]:
+    return [f"{b:g}" for b in LATENCY_BUCKETS] + ["+Inf"]
+
+
+def _empty_histogram() -> Dict[str, Any]:
+    return {
+        "count": 0,
+        "bytes": 0,
+        "total_sec": 0.0,
+        "max_sec": 0.0,
+        "buckets": {label: 0 for label in _bucket_labels()},
+    }
+
+
+def _quantile(histogram: Dict[str, Any], q: float) -> Optional[float]:
+    # Upper bound of the bucket holding the q-th request; good enough to spot
+    # a CDN drifting from sub-second to multi-second responses.
+    count = histogram.get("count") or 0
+    if not count:
+        return None
+    target = q * count
+    seen = 0
+    for bound, label in zip(list(LATENCY_BUCKETS) + [None], _bucket_labels()):
+        seen += histogram["buckets"].get(label, 0)
+        if seen >= target:
+            return bound if bound is not None else round(histogram.get("max_sec", 0.0), 3)
+    return round(histogram.get("max_sec", 0.0), 3)
+
+
+class RunMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, Dict[str, Any]] = {kind: _empty_histogram() for kind in REQUEST_KINDS}
+        self.retries_by_host: Dict[str, int] = {}
+        self.chapters = {"count": 0, "total_sec": 0.0, "max_sec": 0.0}
+
+    def record_request(self, kind: str, latency: float, nbytes: int = 0) -> None:
+        label = _bucket_labels()[-1]
+        for bound, candidate in zip(LATENCY_BUCKETS, _bucket_labels()):
+            if latency <= bound:
+                label = candidate
+                break
+        with self._lock:
+            histogram = self.requests.setdefault(kind, _empty_histogram())
+            histogram["count"] += 1
+            histogram["bytes"] += max(0, int(nbytes))
+            histogram["total_sec"] += latency
+            histogram["max_sec"] = max(histogram["max_sec"], latency)
+            histogram["buckets"][label] += 1
+
+    def record_retry(self, url: str) -> None:
+        host = (urlparse(url).netloc or "").lower()
+        with self._lock:
+            self.retries_by_host[host] = self.retries_by_host.get(host, 0) + 1
+
+    def record_chapter(self, seconds: float) -> None:
+        with self._lock:
+            self.chapters["count"] += 1
+            self.chapters["total_sec"] += seconds
+            self.chapters["max_sec"] = max(self.chapters["max_sec"], seconds)
+
+    def to_dict(self, elapsed_sec: float) -> Dict[str, Any]:
+        with self._lock:
+            requests = {}
+            for kind, histogram in self.requests.items():
+                requests[kind] = {
+                    "count": histogram["count"],
+                    "bytes": histogram["bytes"],
+                    "total_sec": round(histogram["total_sec"], 3),
+                    "max_sec": round(histogram["max_sec"], 3),
+                    "avg_sec": round(histogram["total_sec"] / histogram["count"], 3) if histogram["count"] else None,
+                    "p50_sec": _quantile(histogram, 0.5),
+                    "p95_sec": _quantile(histogram, 0.95),
+                    "buckets": dict(histogram["buckets"]),
+                }
+            bytes_downloaded = sum(h["bytes"] for h in self.requests.values())
+            chapters = dict(self.chapters)
+            retries_by_host = dict(self.retries_by_host)
+        chapters["total_sec"] = round(chapters["total_sec"], 3)
+        chapters["max_sec"] = round(chapters["max_sec"], 3)
+        chapters["avg_sec"] = round(chapters["total_sec"] / chapters["count"], 3) if chapters["count"] else None
+        return {
+            "elapsed_sec": round(elapsed_sec, 3),
+            "bytes_downloaded": bytes_downloaded,
+            "avg_throughput_bps": round(bytes_downloaded / elapsed_sec, 1) if elapsed_sec > 0 else None,
+            "requests": requests,
+            "retries_by_host": retries_by_host,
+            "retries_total": sum(retries_by_host.values()),
+            "chapters": chapters,
+        }
+
+    def merge_dict(self, data: Optional[Dict[str, Any]]) -> None:
+        if not data:
+            return
+        with self._lock:
+            for kind, incoming in (data.get("requests") or {}).items():
+                histogram = self.requests.setdefault(kind, _empty_histogram())
+                histogram["count"] += int(incoming.get("count") or 0)
+                histogram["bytes"] += int(incoming.get("bytes") or 0)
+                histogram["total_sec"] += float(incoming.get("total_sec") or 0.0)
+                histogram["max_sec"] = max(histogram["max_sec"], float(incoming.get("max_sec") or 0.0))
+                for label, n in (incoming.get("buckets") or {}).items():
+                    histogram["buckets"][label] = histogram["buckets"].get(label, 0) + int(n)
+            for host, n in (data.get("retries_by_host") or {}).items():
+                self.retries_by_host[host] = self.retries_by_host.get(host, 0) + int(n)
+            chapters = data.get("chapters") or {}
+            self.chapters["count"] += int(chapters.get("count") or 0)
+            self.chapters["total_sec"] += float(chapters.get("total_sec") or 0.0)
+            self.chapters["max_sec"] = max(self.chapters["max_sec"], float(chapters.get("max_sec") or 0.0))
+
+
+_CURRENT = RunMetrics()
+
+
+def start_run_metrics() -> RunMetrics:
+    global _CURRENT
+    _CURRENT = RunMetrics()
+    return _CURRENT
+
+
+def get_run_metrics() -> RunMetrics:
+    return _CURRENT
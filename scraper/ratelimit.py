@@ -0,0 +1,192 @@
+# Per-host rate limiting, backoff and adaptive concurrency for scraper requests.
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from . import config
+
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+THROTTLE_STATUS_CODES = {429, 503}
+
+_EWMA_ALPHA = 0.2
+_ERROR_RATE_LIMIT = 0.2
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    if retry_after is not None:
+        return min(retry_after, config.BACKOFF_MAX)
+    ceiling = min(config.BACKOFF_MAX, config.BACKOFF_BASE * (2 ** max(0, attempt - 1)))
+    return random.uniform(0, ceiling)
+
+
+class _HostState:
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.rate = rate
+        self.capacity = float(max(1, burst))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.last_decrease = 0.0
+
+
+class HostRateLimiter:
+    """Token bucket per host with an AIMD concurrency limit.
+
+    ``acquire`` blocks until the host has a free concurrency slot, a token is
+    available and any server-requested pause has elapsed. ``release`` feeds the
+    outcome back so the concurrency limit shrinks on errors or slow responses
+    and grows again once the host recovers.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        min_concurrency: Optional[int] = None,
+        latency_target: Optional[float] = None,
+    ):
+        self.rate = config.HOST_RATE_PER_SEC if rate is None else rate
+        self.burst = config.HOST_BURST if burst is None else burst
+        self.max_concurrency = max(1, config.HOST_MAX_CONCURRENCY if max_concurrency is None else max_concurrency)
+        self.min_concurrency = max(1, min(self.max_concurrency, config.HOST_MIN_CONCURRENCY if min_concurrency is None else min_concurrency))
+        self.latency_target = config.HOST_LATENCY_TARGET if latency_target is None else latency_target
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+
+    @staticmethod
+    def _host(url: str) -> str:
+        return (urlparse(url).netloc or "").lower()
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState(self.rate, self.burst, self.max_concurrency)
+            self._hosts[host] = state
+        return state
+
+    def _refill(self, state: _HostState, now: float) -> None:
+        if state.rate <= 0:
+            state.tokens = state.capacity
+        else:
+            state.tokens = min(state.capacity, state.tokens + (now - state.updated_at) * state.rate)
+        state.updated_at = now
+
+    def acquire(self, url: str) -> None:
+        host = self._host(url)
+        with self._cond:
+            state = self._state(host)
+            while True:
+                now = time.monotonic()
+                self._refill(state, now)
+                wait = 0.0
+                if state.blocked_until > now:
+                    wait = state.blocked_until - now
+                elif state.in_flight >= int(state.limit):
+                    wait = None
+                elif state.tokens < 1:
+                    wait = (1 - state.tokens) / state.rate
+                else:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return
+                self._cond.wait(timeout=wait)
+
+    def release(
+        self,
+        url: str,
+        status_code: Optional[int],
+        latency: float,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        host = self._host(url)
+        with self._cond:
+            state = self._state(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            now = time.monotonic()
+            failed = status_code is None or status_code in RETRYABLE_STATUS_CODES
+            state.error_ewma = (1 - _EWMA_ALPHA) * state.error_ewma + _EWMA_ALPHA * (1.0 if failed else 0.0)
+            if not failed:
+                if state.latency_ewma is None:
+                    state.latency_ewma = latency
+                else:
+                    state.latency_ewma = (1 - _EWMA_ALPHA) * state.latency_ewma + _EWMA_ALPHA * latency
+            if status_code in THROTTLE_STATUS_CODES:
+                pause = retry_after if retry_after is not None else backoff_delay(1)
+                state.blocked_until = max(state.blocked_until, now + pause)
+                state.tokens = 0.0
+            degraded = (
+                failed
+                or state.error_ewma > _ERROR_RATE_LIMIT
+                or (state.latency_ewma is not None and state.latency_ewma > self.latency_target)
+            )
+            if degraded:
+                # Multiplicative decrease, at most once per latency window so a
+                # burst of failures from one slowdown does not collapse to 1.
+                if now - state.last_decrease >= max(1.0, state.latency_ewma or 0.0):
+                    state.limit = max(float(self.min_concurrency), state.limit / 2)
+                    state.last_decrease = now
+            else:
+                state.limit = min(float(self.max_concurrency), state.limit + 1 / max(1.0, state.limit))
+            self._cond.notify_all()
+
+    def concurrency_limit(self, url: str) -> int:
+        with self._cond:
+            return int(self._state(self._host(url)).limit)
+
+
+def split_host_budget(share: int) -> None:
+    # Each worker process builds its own limiter; giving every process an
+    # equal slice keeps the pool as a whole within the configured budget.
+    # Must run before the process issues its first request.
+    global _LIMITER, _LIMITER_LOCK
+    share = max(1, int(share))
+    config.HOST_RATE_PER_SEC = config.HOST_RATE_PER_SEC / share
+    config.HOST_BURST = max(1, config.HOST_BURST // share)
+    config.HOST_MAX_CONCURRENCY = max(1, config.HOST_MAX_CONCURRENCY // share)
+    # A forked worker inherits the parent's limiter, already built with the
+    # full budget if the parent made a request (e.g. series discovery).
+    # Drop it, and its lock in case another thread held it at fork time.
+    _LIMITER_LOCK = threading.Lock()
+    _LIMITER = None
+
+
+_LIMITER: Optional[HostRateLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    global _LIMITER
+    with _LIMITER_LOCK:
+        if _LIMITER is None:
+            _LIMITER = HostRateLimiter()
+        return _LIMITER
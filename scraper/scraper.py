@@ -1,31 +1,55 @@
 # Command line scraper for downloading a single manga chapter's images.
 
 import argparse
+import multiprocessing
 import os
 import re
 import sys
 import signal
-from typing import List, Set, Optional, Tuple
+import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Set, Optional, Tuple, Union
 from urllib.parse import urljoin, urlparse
-from .logger import RunLogger
+from .logger import RunLogger, ShardRunLogger
 
 from bs4 import BeautifulSoup
 
 from . import config
+from .cache import configure_html_cache, get_html_cache
+from .discovery import chapter_log_value, extract_chapter_links, missing_chapters
 from .downloader import DownloadError, download_image, fetch_html
+from .metrics import get_run_metrics, start_run_metrics
+from .manifest import hash_file, load_slug_manifests, manifest_is_complete, write_manifest
+from .ratelimit import split_host_budget
+from .url_index import UrlIndex, link_or_copy
+from .variants import collect_images, reencode_available, reencode_images
 
 
 CURRENT_LOGGER: Optional[RunLogger] = None
+# The most recent run's logger, kept after run_scrape returns or raises so a
+# batch worker can still report a failed attempt's metrics.
+LAST_LOGGER: Optional[RunLogger] = None
 
+END_OF_SERIES_STATUS_CODES = {404, 410}
 
-def parse_args() -> argparse.Namespace:
+PARTIAL_SUFFIX = ".part"
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
         description="Download manga chapter images from a given URL.",
     )
     parser.add_argument(
         "--manga-url",
         "-mu",
-        required=True,
         help="URL of the manga chapter page to scrape.",
     )
     parser.add_argument(
@@ -51,6 +75,11 @@ def parse_args() -> argparse.Namespace:
         type=int,
         help="Number of chapters to scrape starting from --start-url (auto-increment).",
     )
+    parser.add_argument(
+        "--series-url",
+        "-s",
+        help="Series page listing every chapter; downloads only the chapters missing on disk.",
+    )
     parser.add_argument(
         "--img-class",
         "-class",
@@ -69,7 +98,49 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Skip already-downloaded chapters/pages based on filesystem state.",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=1,
+        help="Split --chapters or --series-url chapters into this many contiguous shards scraped by parallel worker processes. Default: 1",
+    )
+    parser.add_argument(
+        "--index",
+        action="store_true",
+        help="After a successful run, sync only this manga's slug into the web app database.",
+    )
+    parser.add_argument(
+        "--webp",
+        action="store_true",
+        help="After a successful run, write smaller WebP variants of this manga's pages under each chapter's .variants directory (requires Pillow).",
+    )
+    parser.add_argument(
+        "--webp-quality",
+        type=int,
+        default=config.REENCODE_QUALITY,
+        help=f"WebP quality for --webp (0-100). Default: {config.REENCODE_QUALITY}",
+    )
+    parser.add_argument(
+        "--max-width",
+        type=int,
+        default=config.REENCODE_MAX_WIDTH,
+        help="Downscale --webp variants wider than this many pixels. Default: keep the original width",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="no_cache",
+        action="store_true",
+        help="Bypass the on-disk HTML cache and always fetch chapter pages in full.",
+    )
+    args = parser.parse_args(argv)
+    if not args.manga_url and not args.series_url:
+        parser.error("one of --manga-url or --series-url is required")
+    if args.webp and not reencode_available():
+        parser.error("--webp requires Pillow (pip install Pillow)")
+    if not 0 <= args.webp_quality <= 100:
+        parser.error("--webp-quality must be between 0 and 100")
+    return args
 
 
 def derive_manga_slug(chapter_url: str) -> str:
@@ -93,56 +164,48 @@ def derive_chapter_number(chapter_url: str) -> str:
     return "1"
 
 
-def extract_image_urls(html: str, base_url: str, required_class: Optional[str], fallback_classes: List[str]) -> Tuple[List[str], Optional[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+def parse_html(html: str) -> BeautifulSoup:
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+def load_chapter_page(chapter_url: str) -> BeautifulSoup:
+    return parse_html(fetch_html(chapter_url))
+
+
+def _collect_image_urls(images, base_url: str) -> List[str]:
+    result: List[str] = []
+    for img in images:
+        src = (img.get("src") or "").strip()
+        if not src:
+            continue
+        absolute = urljoin(base_url, src)
+        if not absolute:
+            continue
+        lower = absolute.lower()
+        if not (lower.endswith(".jpg") or lower.endswith(".jpeg") or lower.endswith(".png") or lower.endswith(".webp")):
+            continue
+        result.append(absolute)
+    return result
+
+
+def extract_image_urls(page: Union[str, BeautifulSoup], base_url: str, required_class: Optional[str], fallback_classes: List[str]) -> Tuple[List[str], Optional[str]]:
+    soup = parse_html(page) if isinstance(page, str) else page
     candidates: List[str] = []
     used_class: Optional[str] = None
 
     if required_class:
-        for img in soup.find_all("img", class_=required_class):
-            src = (img.get("src") or "").strip()
-            if not src:
-                continue
-            absolute = urljoin(base_url, src)
-            if not absolute:
-                continue
-            lower = absolute.lower()
-            if not (lower.endswith(".jpg") or lower.endswith(".jpeg") or lower.endswith(".png") or lower.endswith(".webp")):
-                continue
-            candidates.append(absolute)
+        candidates = _collect_image_urls(soup.find_all("img", class_=required_class), base_url)
         if candidates:
             used_class = required_class
     if not candidates and fallback_classes:
         for fb in fallback_classes:
-            temp: List[str] = []
-            for img in soup.find_all("img", class_=fb):
-                src = (img.get("src") or "").strip()
-                if not src:
-                    continue
-                absolute = urljoin(base_url, src)
-                if not absolute:
-                    continue
-                lower = absolute.lower()
-                if not (lower.endswith(".jpg") or lower.endswith(".jpeg") or lower.endswith(".png") or lower.endswith(".webp")):
-                    continue
-                temp.append(absolute)
+            temp = _collect_image_urls(soup.find_all("img", class_=fb), base_url)
             if temp:
                 candidates = temp
                 used_class = fb
                 break
     if not candidates:
-        temp2: List[str] = []
-        for img in soup.select("div.reading-content img"):
-            src = (img.get("src") or "").strip()
-            if not src:
-                continue
-            absolute = urljoin(base_url, src)
-            if not absolute:
-                continue
-            lower = absolute.lower()
-            if not (lower.endswith(".jpg") or lower.endswith(".jpeg") or lower.endswith(".png") or lower.endswith(".webp")):
-                continue
-            temp2.append(absolute)
+        temp2 = _collect_image_urls(soup.select("div.reading-content img"), base_url)
         if temp2:
             candidates = temp2
             used_class = "div.reading-content img"
@@ -150,11 +213,20 @@ def extract_image_urls(html: str, base_url: str, required_class: Optional[str],
     return candidates, used_class
 
 
+def prefetch_chapter(chapter_url: str, required_class: Optional[str], fallback_classes: List[str]) -> Tuple[BeautifulSoup, Tuple[List[str], Optional[str]]]:
+    soup = load_chapter_page(chapter_url)
+    return soup, extract_image_urls(soup, chapter_url, required_class, fallback_classes)
+
+
+def discover_chapters(series_url: str) -> List[Tuple[str, str]]:
+    return extract_chapter_links(parse_html(fetch_html(series_url)), series_url)
+
+
 def build_output_directory(manga_slug: str, chapter_number: str) -> str:
     return os.path.join(config.BASE_STORAGE_PATH, manga_slug, chapter_number)
 
-def _extract_chapter_dir_name(html: str, default_fallback: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
+def _extract_chapter_dir_name(page: Union[str, BeautifulSoup], default_fallback: str) -> str:
+    soup = parse_html(page) if isinstance(page, str) else page
     inp = soup.find("input", id="wp-manga-current-chap")
     value = None
     if inp:
@@ -166,14 +238,29 @@ def _extract_chapter_dir_name(html: str, default_fallback: str) -> str:
     safe = re.sub(r"[^a-zA-Z0-9._-]+", "-", base).strip("-").lower()
     return safe or default_fallback
 
-def is_chapter_complete(manga_slug: str, chapter_number: str) -> bool:
+def is_chapter_complete(manga_slug: str, chapter_number: str, expected_files: Optional[List[str]] = None) -> bool:
     chapter_dir = build_output_directory(manga_slug, chapter_number)
     if not os.path.isdir(chapter_dir):
         return False
     files = [f for f in os.listdir(chapter_dir) if os.path.isfile(os.path.join(chapter_dir, f))]
+    if any(f.endswith(PARTIAL_SUFFIX) for f in files):
+        return False
+    if expected_files is not None:
+        present = set(files)
+        return bool(expected_files) and all(name in present for name in expected_files)
     return len(files) > 0
 
 
+def completed_by_manifest(manifests: Dict[str, Tuple[str, Dict[str, Any]]], manga_slug: str, chapter_url: str) -> Optional[str]:
+    found = manifests.get(chapter_url)
+    if found is None:
+        return None
+    dir_name, manifest = found
+    if not manifest_is_complete(build_output_directory(manga_slug, dir_name), manifest):
+        return None
+    return dir_name
+
+
 def determine_padded_filename(index: int, total: int, image_url: str) -> str:
     width = max(3, len(str(total)))
     parsed = urlparse(image_url)
@@ -257,6 +344,20 @@ def _select_best_pattern(urls: List[str]) -> Tuple[List[str], Optional[str]]:
     return urls, None
 
 
+def select_chapter_images(urls: List[str], allowed_exts: Set[str]) -> Tuple[List[str], int, Optional[str]]:
+    image_urls = filter_by_formats(urls, allowed_exts)
+    total = len(image_urls)
+    filtered_urls, pattern_name = _select_best_pattern(image_urls)
+    # Fallback if overly restrictive
+    if filtered_urls and len(filtered_urls) >= max(1, int(0.6 * len(image_urls))):
+        image_urls = filtered_urls
+    return image_urls, total, pattern_name
+
+
+def planned_filenames(image_urls: List[str], total: int) -> List[str]:
+    return [determine_padded_filename(index, total, url) for index, url in enumerate(image_urls, start=1)]
+
+
 def increment_chapter_url(base_url: str, next_chapter_number: int) -> str:
     parsed = urlparse(base_url)
     segments = [segment for segment in parsed.path.split("/") if segment]
@@ -296,45 +397,332 @@ def _signal_handler(signum, frame):
     raise SystemExit(1)
 
 
-def scrape_chapter(chapter_url: str, manga_slug: str, allowed_exts: Set[str], logger: RunLogger, resume: bool = False, required_class: Optional[str] = None, fallback_classes: Optional[List[str]] = None) -> Tuple[str, int]:
-    html = fetch_html(chapter_url)
+def scrape_chapter(chapter_url: str, manga_slug: str, allowed_exts: Set[str], logger: RunLogger, resume: bool = False, required_class: Optional[str] = None, fallback_classes: Optional[List[str]] = None, soup: Optional[BeautifulSoup] = None, extracted: Optional[Tuple[List[str], Optional[str]]] = None, chapter_number: Optional[str] = None, url_index: Optional[UrlIndex] = None) -> Tuple[str, int]:
+    started = time.monotonic()
+    if soup is None:
+        soup = load_chapter_page(chapter_url)
+        extracted = None
 
-    urls, used_class = extract_image_urls(html, chapter_url, required_class, fallback_classes or [])
+    if extracted is None:
+        extracted = extract_image_urls(soup, chapter_url, required_class, fallback_classes or [])
+    urls, used_class = extracted
     if not urls:
         raise RuntimeError("No image URLs were found on the provided page.")
     logger.fallback_class_used = used_class
     logger._write()
 
-    chapter_number = derive_chapter_number(chapter_url)
-    chapter_dir_name = _extract_chapter_dir_name(html, chapter_number)
+    chapter_number = chapter_number or derive_chapter_number(chapter_url)
+    chapter_dir_name = _extract_chapter_dir_name(soup, chapter_number)
     output_dir = build_output_directory(manga_slug, chapter_dir_name)
     os.makedirs(output_dir, exist_ok=True)
 
-    image_urls = filter_by_formats(urls, allowed_exts)
-    total = len(image_urls)
+    image_urls, total, pattern_name = select_chapter_images(urls, allowed_exts)
     logger.update_stats(manga=1, chapters=1, pages=total)
-    filtered_urls, pattern_name = _select_best_pattern(image_urls)
-    # Fallback if overly restrictive
-    if filtered_urls and len(filtered_urls) >= max(1, int(0.6 * len(image_urls))):
-        image_urls = filtered_urls
     logger.source_pattern_detected = pattern_name
     logger._write()
 
+    planned = list(zip(image_urls, planned_filenames(image_urls, total)))
+    # A caller scraping many chapters passes one index for the whole run and
+    # saves it itself; loading it here per chapter would reread the file each time.
+    owns_index = url_index is None
+    if owns_index:
+        url_index = UrlIndex(manga_slug)
+    results: Dict[str, Tuple[int, str]] = {}
+    pending: List[Tuple[str, str]] = []
     written = 0
-    for index, image_url in enumerate(image_urls, start=1):
-        final_name = determine_padded_filename(index, total, image_url)
+    for image_url, final_name in planned:
         destination_path = os.path.join(output_dir, final_name)
         if resume and os.path.exists(destination_path):
             continue
-        download_image(image_url, destination_path)
-        written += 1
-        logger.add_files_written(1)
+        known = url_index.lookup(image_url)
+        if known is not None:
+            # Fetched before (another chapter directory or an earlier run):
+            # reuse the stored bytes instead of downloading them again.
+            if os.path.normcase(os.path.abspath(known["full_path"])) != os.path.normcase(os.path.abspath(destination_path)):
+                link_or_copy(known["full_path"], destination_path)
+            results[final_name] = (known["size"], known["sha256"])
+            written += 1
+            logger.add_files_written(1)
+            logger.reused_files += 1
+            continue
+        pending.append((image_url, final_name))
+
+    # The per-host limiter decides how many of these actually run at once.
+    with ThreadPoolExecutor(max_workers=max(1, config.HOST_MAX_CONCURRENCY)) as executor:
+        futures = {
+            executor.submit(download_image, url, os.path.join(output_dir, name)): name
+            for url, name in pending
+        }
+        try:
+            for future in as_completed(futures):
+                try:
+                    size, sha256, integrity_failures = future.result()
+                except DownloadError as exc:
+                    if exc.integrity_failures:
+                        logger.record_integrity(checked=1, failed_checks=exc.integrity_failures, rejected=1)
+                        logger._write()
+                    raise
+                results[futures[future]] = (size, sha256)
+                logger.record_integrity(checked=1, failed_checks=integrity_failures)
+                written += 1
+                logger.add_files_written(1)
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+
+    images: List[Dict[str, Any]] = []
+    for image_url, final_name in planned:
+        if final_name in results:
+            size, sha256 = results[final_name]
+        else:
+            path = os.path.join(output_dir, final_name)
+            size, sha256 = os.path.getsize(path), hash_file(path)
+        images.append({"file": final_name, "url": image_url, "size": size, "sha256": sha256})
+        url_index.record(image_url, os.path.join(output_dir, final_name), size, sha256)
+    write_manifest(output_dir, chapter_url, chapter_number, images)
+    if owns_index:
+        url_index.save()
+    get_run_metrics().record_chapter(time.monotonic() - started)
 
     return output_dir, written
 
 
-def main() -> None:
-    args = parse_args()
+def scrape_chapter_urls(chapter_urls: List[str], manga_slug: str, allowed_exts: Set[str], logger: RunLogger, resume: bool = False, required_class: Optional[str] = None, fallback_classes: Optional[List[str]] = None, end_at_first: bool = False, chapter_numbers: Optional[Dict[str, str]] = None) -> str:
+    """Scrape ``chapter_urls`` in order, prefetching each next page.
+
+    Stops quietly at the end of the series (a 404/410 or a page without
+    images). The first URL is only allowed to be that end when
+    ``end_at_first`` is set, e.g. for a shard that starts past the last chapter.
+    URLs with an entry in ``chapter_numbers`` came from the series page, so
+    they are never taken as the end and keep their (possibly decimal) number.
+    """
+    fallback_classes = fallback_classes or []
+    output_dir = ""
+    manifests = load_slug_manifests(manga_slug) if resume else {}
+    prefetcher = ThreadPoolExecutor(max_workers=1)
+    url_index = UrlIndex(manga_slug)
+
+    def schedule(url: str):
+        # Chapters whose manifest proves them complete are never fetched.
+        if resume and completed_by_manifest(manifests, manga_slug, url):
+            return None
+        return prefetcher.submit(prefetch_chapter, url, required_class, fallback_classes)
+
+    try:
+        pending = schedule(chapter_urls[0]) if chapter_urls else None
+        for i, target_url in enumerate(chapter_urls):
+            known_number = (chapter_numbers or {}).get(target_url)
+            chapter_number = known_number or derive_chapter_number(target_url)
+            chapter_int: Optional[Union[int, float]] = None
+            try:
+                chapter_int = chapter_log_value(known_number) if known_number else int(chapter_number)
+            except Exception:
+                chapter_int = None
+
+            current, pending = pending, None
+            soup = None
+            extracted = None
+            may_end = (i > 0 or end_at_first) and known_number is None
+            unavailable = False
+            if current is not None:
+                try:
+                    soup, extracted = current.result()
+                except DownloadError as exc:
+                    if exc.status_code in END_OF_SERIES_STATUS_CODES:
+                        if may_end:
+                            break
+                        if known_number is None:
+                            raise
+                        # Listed on the series page but gone: note it and go on.
+                        unavailable = True
+                        if chapter_int is not None:
+                            logger.unavailable_chapters.append(chapter_int)
+                            logger._write()
+                except Exception:
+                    pass
+                if may_end and soup is not None and not extracted[0]:
+                    # A reachable page without images marks the end of the series.
+                    break
+            if i + 1 < len(chapter_urls):
+                # Resolve and parse the next chapter while this one downloads.
+                pending = schedule(chapter_urls[i + 1])
+            if unavailable:
+                continue
+            if current is None:
+                if chapter_int is not None:
+                    logger.skipped_chapters.append(chapter_int)
+                    logger.last_completed_chapter = chapter_int
+                    logger._write()
+                continue
+
+            dir_name_for_resume = chapter_number
+            expected_files: Optional[List[str]] = None
+            if soup is not None:
+                dir_name_for_resume = _extract_chapter_dir_name(soup, chapter_number)
+                image_urls, total, _ = select_chapter_images(extracted[0], allowed_exts)
+                expected_files = planned_filenames(image_urls, total)
+            if resume and is_chapter_complete(manga_slug, dir_name_for_resume, expected_files):
+                if chapter_int is not None:
+                    logger.skipped_chapters.append(chapter_int)
+                    logger.last_completed_chapter = chapter_int
+                    logger._write()
+                continue
+
+            output_dir, wrote = scrape_chapter(target_url, manga_slug, allowed_exts, logger, resume=resume, required_class=required_class, fallback_classes=fallback_classes, soup=soup, extracted=extracted, chapter_number=chapter_number, url_index=url_index)
+            if chapter_int is not None and wrote > 0:
+                logger.downloaded_chapters.append(chapter_int)
+                logger.last_completed_chapter = chapter_int
+                logger._write()
+    finally:
+        prefetcher.shutdown(wait=False, cancel_futures=True)
+        url_index.save()
+    return output_dir
+
+
+def split_shards(items: List[str], shard_count: int) -> List[List[str]]:
+    shard_count = max(1, min(shard_count, len(items)))
+    size, extra = divmod(len(items), shard_count)
+    shards: List[List[str]] = []
+    pos = 0
+    for index in range(shard_count):
+        end = pos + size + (1 if index < extra else 0)
+        shards.append(items[pos:end])
+        pos = end
+    return shards
+
+
+def _scrape_shard(shard_id: int, queue: Any, chapter_urls: List[str], manga_slug: str, allowed_exts: Set[str], resume: bool, required_class: Optional[str], fallback_classes: List[str], no_cache: bool, chapter_numbers: Optional[Dict[str, str]] = None) -> str:
+    configure_html_cache(config.HTML_CACHE_ENABLED and not no_cache)
+    shard_logger = ShardRunLogger(queue, shard_id, component="scraper", run_type="scrape", manga_slug=manga_slug)
+    shard_logger.metrics = start_run_metrics()
+    try:
+        output_dir = scrape_chapter_urls(chapter_urls, manga_slug, allowed_exts, shard_logger, resume=resume, required_class=required_class, fallback_classes=fallback_classes, end_at_first=shard_id > 0, chapter_numbers=chapter_numbers)
+    except KeyboardInterrupt:
+        shard_logger.mark_interrupted("Interrupted by user")
+        raise
+    except Exception as exc:
+        shard_logger.fail(str(exc))
+        raise
+    shard_logger.finish("success")
+    return output_dir
+
+
+def scrape_chapters_parallel(chapter_urls: List[str], manga_slug: str, allowed_exts: Set[str], logger: RunLogger, workers: int, resume: bool = False, required_class: Optional[str] = None, fallback_classes: Optional[List[str]] = None, chapter_numbers: Optional[Dict[str, str]] = None) -> str:
+    """Split ``chapter_urls`` into contiguous shards scraped by worker processes.
+
+    Workers send RunLogger snapshots over a manager queue; a listener thread
+    merges them into ``logger`` so its chapter lists stay live and correct.
+    """
+    shards = split_shards(chapter_urls, workers)
+    no_cache = get_html_cache() is None
+    manager = multiprocessing.Manager()
+    queue = manager.Queue()
+
+    def listen() -> None:
+        while True:
+            message = queue.get()
+            if message is None:
+                return
+            shard_id, snapshot = message
+            logger.merge_shard(shard_id, snapshot)
+
+    listener = threading.Thread(target=listen, daemon=True)
+    listener.start()
+    output_dir = ""
+    try:
+        with ProcessPoolExecutor(max_workers=len(shards), initializer=split_host_budget, initargs=(len(shards),)) as pool:
+            futures = [
+                pool.submit(_scrape_shard, shard_id, queue, shard, manga_slug, allowed_exts, resume, required_class, fallback_classes or [], no_cache, {url: chapter_numbers[url] for url in shard if url in chapter_numbers} if chapter_numbers else None)
+                for shard_id, shard in enumerate(shards)
+            ]
+            errors: List[BaseException] = []
+            for future in futures:
+                try:
+                    result = future.result()
+                    if result:
+                        output_dir = result
+                except Exception as exc:
+                    errors.append(exc)
+            if errors:
+                raise errors[0]
+    finally:
+        queue.put(None)
+        listener.join()
+        manager.shutdown()
+    return output_dir
+
+
+def completed_chapter_range(logger: RunLogger) -> Optional[str]:
+    done = set(logger.skipped_chapters) | set(logger.downloaded_chapters)
+    if not done:
+        return None
+    return f"{min(done)}-{max(done)}"
+
+
+def reencode_slug(manga_slug: str, logger: RunLogger, quality: int, max_width: int) -> bool:
+    # Variants are an optimisation only: a failure here is logged but never
+    # fails a scrape whose originals are already safely on disk.
+    started = time.monotonic()
+    try:
+        stats = reencode_images(collect_images(os.path.join(config.BASE_STORAGE_PATH, manga_slug)), quality=quality, max_width=max_width)
+        error = None
+    except Exception as exc:
+        stats = {}
+        error = str(exc) or exc.__class__.__name__
+    stats["duration_sec"] = round(time.monotonic() - started, 3)
+    stats["error"] = error
+    logger.reencode = stats
+    logger._write()
+    return error is None
+
+
+def trigger_indexer(manga_slug: str, logger: RunLogger) -> bool:
+    # Runs indexer/indexer.py in a subprocess so the scraper never imports
+    # the Flask app; the child is pointed at the storage this run wrote to.
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["STORAGE_MANGA_PATH"] = config.BASE_STORAGE_PATH
+    env["STORAGE_RUN_LOGS_PATH"] = config.RUN_LOGS_PATH
+    started = time.monotonic()
+    error: Optional[str] = None
+    try:
+        completed = subprocess.run(
+            [sys.executable, "-m", "indexer.indexer", "--manga-slug", manga_slug],
+            cwd=project_root,
+            env=env,
+            capture_output=True,
+            text=True,
+            timeout=config.INDEXER_TIMEOUT,
+        )
+        if completed.returncode != 0:
+            tail = (completed.stderr or completed.stdout or "").strip().splitlines()[-1:]
+            error = f"Indexer exited with code {completed.returncode}" + (f": {tail[0]}" if tail else "")
+    except subprocess.TimeoutExpired:
+        error = f"Indexer timed out after {config.INDEXER_TIMEOUT:g}s"
+    except OSError as exc:
+        error = f"Could not start indexer: {exc}"
+    logger.set_indexer_triggered(True, duration_sec=time.monotonic() - started, error=error)
+    return error is None
+
+
+def _install_signal_handlers() -> None:
+    try:
+        signal.signal(signal.SIGINT, _signal_handler)
+    except Exception:
+        pass
+    try:
+        sigterm = getattr(signal, "SIGTERM", None)
+        if sigterm is not None:
+            signal.signal(sigterm, _signal_handler)
+    except Exception:
+        pass
+
+
+def run_scrape(args: argparse.Namespace) -> Tuple[str, RunLogger]:
+    # Set both ways: batch workers are reused, so one --no-cache job must
+    # not leave the cache off for the jobs that follow it.
+    configure_html_cache(config.HTML_CACHE_ENABLED and not args.no_cache)
     chapter_url = args.manga_url
     manga_slug = slugify_name(args.manga_name)
     allowed_exts = parse_formats_arg(args.formats)
@@ -353,70 +741,57 @@ def main() -> None:
         run_type="scrape",
         manga_slug=manga_slug,
         manga_name=args.manga_name,
-        start_url=args.start_url,
+        start_url=args.start_url or args.series_url,
         chapter_count=args.chapters,
         chapter_range=None,
         allowed_formats=allowed_tokens or ["jpg"],
     )
     logger.resume_enabled = bool(getattr(args, "resume", False))
+    logger.metrics = start_run_metrics()
     logger._write()
 
-    global CURRENT_LOGGER
+    global CURRENT_LOGGER, LAST_LOGGER
     CURRENT_LOGGER = logger
+    LAST_LOGGER = logger
 
+    output_dir = ""
     try:
-        signal.signal(signal.SIGINT, _signal_handler)
-    except Exception:
-        pass
-    try:
-        sigterm = getattr(signal, "SIGTERM", None)
-        if sigterm is not None:
-            signal.signal(sigterm, _signal_handler)
-    except Exception:
-        pass
-
-    try:
-        if args.chapters and args.start_url:
-            output_dir = ""
+        if args.series_url:
+            discovered = discover_chapters(args.series_url)
+            if not discovered:
+                raise RuntimeError("No chapter links were found on the series page.")
+            missing = missing_chapters(discovered, manga_slug)
+            logger.chapter_count = len(missing)
+            logger._write()
+            if missing:
+                chapter_urls = [url for url, _ in missing]
+                chapter_numbers = dict(missing)
+                workers = max(1, int(getattr(args, "workers", 1) or 1))
+                if workers > 1 and len(chapter_urls) > 1:
+                    output_dir = scrape_chapters_parallel(chapter_urls, manga_slug, allowed_exts, logger, workers, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes, chapter_numbers=chapter_numbers)
+                else:
+                    output_dir = scrape_chapter_urls(chapter_urls, manga_slug, allowed_exts, logger, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes, chapter_numbers=chapter_numbers)
+            else:
+                output_dir = os.path.join(config.BASE_STORAGE_PATH, manga_slug)
+            # Added after scraping: merging --workers shards rebuilds the list.
+            missing_urls = {url for url, _ in missing}
+            stored = [chapter_log_value(number) for url, number in discovered if url not in missing_urls]
+            logger.skipped_chapters = sorted(set(logger.skipped_chapters) | set(stored))
+            logger.chapter_range = completed_chapter_range(logger)
+            logger.finish("success")
+        elif args.chapters and args.start_url:
             start_num_str = derive_chapter_number(args.start_url)
             try:
                 start = int(start_num_str)
             except Exception:
                 start = 1
-            for i in range(args.chapters):
-                next_num = start + i
-                target_url = increment_chapter_url(args.start_url, next_num)
-                chapter_number = derive_chapter_number(target_url)
-                chapter_int: Optional[int] = None
-                try:
-                    chapter_int = int(chapter_number)
-                except Exception:
-                    chapter_int = None
-
-                dir_name_for_resume = chapter_number
-                try:
-                    html_pre = fetch_html(target_url)
-                    dir_name_for_resume = _extract_chapter_dir_name(html_pre, chapter_number)
-                except Exception:
-                    pass
-                if args.resume and is_chapter_complete(manga_slug, dir_name_for_resume):
-                    if chapter_int is not None:
-                        logger.skipped_chapters.append(chapter_int)
-                        logger.last_completed_chapter = chapter_int
-                        logger._write()
-                    continue
-
-                output_dir, wrote = scrape_chapter(target_url, manga_slug, allowed_exts, logger, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes)
-                if chapter_int is not None and wrote > 0:
-                    logger.downloaded_chapters.append(chapter_int)
-                    logger.last_completed_chapter = chapter_int
-                    logger._write()
-            try:
-                s = int(start_num)
-                e = s + args.chapters - 1
-                logger.chapter_range = f"{s}-{e}"
-            except Exception:
-                logger.chapter_range = None
+            chapter_urls = [increment_chapter_url(args.start_url, start + i) for i in range(args.chapters)]
+            workers = max(1, int(getattr(args, "workers", 1) or 1))
+            if workers > 1 and len(chapter_urls) > 1:
+                output_dir = scrape_chapters_parallel(chapter_urls, manga_slug, allowed_exts, logger, workers, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes)
+            else:
+                output_dir = scrape_chapter_urls(chapter_urls, manga_slug, allowed_exts, logger, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes)
+            logger.chapter_range = completed_chapter_range(logger)
             logger.finish("success")
         else:
             chapter_number = derive_chapter_number(chapter_url)
@@ -427,12 +802,21 @@ def main() -> None:
                 chapter_int = None
 
             dir_name_for_resume = chapter_number
-            try:
-                html_pre = fetch_html(chapter_url)
-                dir_name_for_resume = _extract_chapter_dir_name(html_pre, chapter_number)
-            except Exception:
-                pass
-            if args.resume and is_chapter_complete(manga_slug, dir_name_for_resume):
+            soup = None
+            extracted = None
+            expected_files: Optional[List[str]] = None
+            manifest_dir = completed_by_manifest(load_slug_manifests(manga_slug), manga_slug, chapter_url) if args.resume else None
+            if manifest_dir is not None:
+                dir_name_for_resume = manifest_dir
+            else:
+                try:
+                    soup, extracted = prefetch_chapter(chapter_url, getattr(args, "img_class", None), fallback_classes)
+                    dir_name_for_resume = _extract_chapter_dir_name(soup, chapter_number)
+                    image_urls, total, _ = select_chapter_images(extracted[0], allowed_exts)
+                    expected_files = planned_filenames(image_urls, total)
+                except Exception:
+                    pass
+            if manifest_dir is not None or (args.resume and is_chapter_complete(manga_slug, dir_name_for_resume, expected_files)):
                 if chapter_int is not None:
                     logger.skipped_chapters.append(chapter_int)
                     logger.last_completed_chapter = chapter_int
@@ -440,7 +824,7 @@ def main() -> None:
                 output_dir = build_output_directory(manga_slug, dir_name_for_resume)
                 logger.finish("success")
             else:
-                output_dir, wrote = scrape_chapter(chapter_url, manga_slug, allowed_exts, logger, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes)
+                output_dir, wrote = scrape_chapter(chapter_url, manga_slug, allowed_exts, logger, resume=args.resume, required_class=getattr(args, "img_class", None), fallback_classes=fallback_classes, soup=soup, extracted=extracted)
                 if chapter_int is not None and wrote > 0:
                     logger.downloaded_chapters.append(chapter_int)
                     logger.last_completed_chapter = chapter_int
@@ -448,15 +832,38 @@ def main() -> None:
                 logger.finish("success")
     except KeyboardInterrupt:
         logger.mark_interrupted("Interrupted by user")
+        raise
+    except Exception as exc:
+        logger.fail(str(exc))
+        raise
+    finally:
+        CURRENT_LOGGER = None
+
+    if getattr(args, "webp", False) and logger.status == "success":
+        reencode_slug(manga_slug, logger, args.webp_quality, args.max_width)
+
+    if getattr(args, "index", False) and logger.status == "success":
+        trigger_indexer(manga_slug, logger)
+
+    return output_dir, logger
+
+
+def main() -> None:
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from .batch import batch_main
+
+        batch_main(sys.argv[2:])
+        return
+    args = parse_args()
+    _install_signal_handlers()
+    try:
+        output_dir, _ = run_scrape(args)
+    except KeyboardInterrupt:
         raise SystemExit(130)
     except DownloadError as exc:
-        logger.fail(str(exc))
         raise SystemExit(f"Download error while scraping chapter: {exc}") from exc
     except Exception as exc:
-        logger.fail(str(exc))
         raise SystemExit(f"Unexpected error while scraping chapter: {exc}") from exc
-    finally:
-        CURRENT_LOGGER = None
 
     sys.stdout.write(f"Images saved under: {output_dir}{os.linesep}")
 
@@ -0,0 +1,132 @@
+# Per-slug index of already-downloaded image URLs, used to reuse files instead of re-fetching them.
+
+import json
+import os
+import shutil
+import threading
+from typing import Any, Dict, Optional
+
+from . import config
+from .manifest import load_slug_manifests
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+URL_INDEX_FILENAME = ".url_index.json"
+URL_INDEX_VERSION = 1
+
+
+def link_or_copy(source_path: str, destination_path: str) -> None:
+    # A hard link costs no space; copy when the filesystem refuses (different
+    # device, FAT, Windows without privileges). Either way the destination
+    # only appears once it is complete.
+    tmp_path = f"{destination_path}.link"
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+    try:
+        os.link(source_path, tmp_path)
+    except OSError:
+        shutil.copy2(source_path, tmp_path)
+    os.replace(tmp_path, destination_path)
+
+
+class UrlIndex:
+    """``storage/manga/<slug>/.url_index.json``: image URL -> stored file, size and SHA-256.
+
+    Paths are relative to the slug directory. The SHA-256 goes into the
+    manifest of a chapter that reuses the file, so reused images are never
+    hashed again. The index is seeded from the chapter manifests the first
+    time it is loaded, and ``save`` merges with whatever another process
+    wrote in the meantime before replacing the file; writers serialise on
+    ``.url_index.json.lock`` next to it, which is left in place.
+
+    Load one instance per run (or shard) and ``save`` it at the end: the
+    file grows with every chapter of the slug.
+    """
+
+    def __init__(self, manga_slug: str):
+        self.slug_dir = os.path.join(config.BASE_STORAGE_PATH, manga_slug)
+        self.path = os.path.join(self.slug_dir, URL_INDEX_FILENAME)
+        self._lock = threading.Lock()
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+        self.entries = self._read()
+        if not self.entries:
+            self.entries = self._from_manifests(manga_slug)
+            self._dirty.update(self.entries)
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        entries = data.get("entries") if isinstance(data, dict) else None
+        return entries if isinstance(entries, dict) else {}
+
+    @staticmethod
+    def _from_manifests(manga_slug: str) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        for dir_name, manifest in load_slug_manifests(manga_slug).values():
+            for image in manifest.get("images") or []:
+                try:
+                    entries[image["url"]] = {
+                        "path": f"{dir_name}/{image['file']}",
+                        "size": int(image["size"]),
+                        "sha256": image["sha256"],
+                    }
+                except (KeyError, TypeError, ValueError):
+                    continue
+        return entries
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """The stored entry for ``url`` if its file is still there with the recorded size."""
+        with self._lock:
+            entry = self.entries.get(url)
+        if not entry:
+            return None
+        full_path = os.path.join(self.slug_dir, *entry["path"].split("/"))
+        try:
+            if os.path.getsize(full_path) != entry["size"]:
+                return None
+        except (OSError, KeyError, TypeError):
+            return None
+        return dict(entry, full_path=full_path)
+
+    def record(self, url: str, file_path: str, size: int, sha256: str) -> None:
+        relative = os.path.relpath(file_path, self.slug_dir).replace(os.sep, "/")
+        entry = {"path": relative, "size": int(size), "sha256": sha256}
+        with self._lock:
+            if self.entries.get(url) == entry:
+                return
+            self.entries[url] = entry
+            self._dirty[url] = entry
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            dirty = dict(self._dirty)
+        os.makedirs(self.slug_dir, exist_ok=True)
+        lock_file = open(f"{self.path}.lock", "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            merged = self._read()
+            merged.update(dirty)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": URL_INDEX_VERSION, "entries": merged}, f)
+            os.replace(tmp_path, self.path)
+        finally:
+            lock_file.close()
+        with self._lock:
+            for url, entry in dirty.items():
+                if self._dirty.get(url) == entry:
+                    del self._dirty[url]
+            for url, entry in merged.items():
+                self.entries.setdefault(url, entry)
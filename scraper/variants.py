@@ -0,0 +1,153 @@
+# Optional re-encoding of stored pages into smaller WebP/AVIF variants under <chapter>/.variants/.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import config
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional; the stage is simply unavailable.
+    Image = None
+
+
+VARIANTS_DIRNAME = ".variants"
+SOURCE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+VARIANT_FORMATS = {"webp": "WEBP", "avif": "AVIF"}
+
+
+def reencode_available(fmt: str = "webp") -> bool:
+    if Image is None or fmt not in VARIANT_FORMATS:
+        return False
+    try:
+        from PIL import features
+        return bool(features.check(fmt))
+    except Exception:
+        return fmt == "webp"
+
+
+def variant_path(image_path: str, fmt: str = "webp") -> str:
+    directory, name = os.path.split(image_path)
+    stem, _ = os.path.splitext(name)
+    return os.path.join(directory, VARIANTS_DIRNAME, f"{stem}.{fmt}")
+
+
+def _is_fresh(source_path: str, target_path: str) -> bool:
+    try:
+        return os.path.getmtime(target_path) >= os.path.getmtime(source_path)
+    except OSError:
+        return False
+
+
+def encode_variant(source_path: str, fmt: str = "webp", quality: int = 80, max_width: int = 0) -> Tuple[str, int, Optional[int]]:
+    """Write ``variant_path(source_path, fmt)`` if the re-encoded image is smaller.
+
+    Returns ``(status, source_size, variant_size)`` where status is one of
+    "written", "fresh" (an up-to-date variant already exists), "larger" (the
+    re-encode did not help, so only the original is kept) or "same-format".
+    Runs in a worker process, so it only takes and returns plain values.
+    """
+    source_size = os.path.getsize(source_path)
+    target_path = variant_path(source_path, fmt)
+    # Marks a source whose re-encode came out larger, so later runs skip it.
+    skip_marker = f"{target_path}.skip"
+    if _is_fresh(source_path, target_path):
+        return "fresh", source_size, os.path.getsize(target_path)
+    if _is_fresh(source_path, skip_marker):
+        return "larger", source_size, None
+    _, ext = os.path.splitext(source_path.lower())
+    if ext == f".{fmt}" and not max_width:
+        return "same-format", source_size, None
+
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    tmp_path = f"{target_path}.{os.getpid()}.tmp"
+    try:
+        with Image.open(source_path) as image:
+            image.load()
+            if image.mode not in ("RGB", "RGBA"):
+                has_alpha = image.mode in ("LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+                image = image.convert("RGBA" if has_alpha else "RGB")
+            if max_width and image.width > max_width:
+                height = max(1, round(image.height * max_width / image.width))
+                image = image.resize((max_width, height), Image.LANCZOS)
+            options = {"quality": quality}
+            if fmt == "webp":
+                options["method"] = 4
+            image.save(tmp_path, format=VARIANT_FORMATS[fmt], **options)
+        variant_size = os.path.getsize(tmp_path)
+        if variant_size >= source_size:
+            os.remove(tmp_path)
+            if os.path.exists(target_path):
+                os.remove(target_path)
+            open(skip_marker, "w").close()
+            return "larger", source_size, None
+        os.replace(tmp_path, target_path)
+        if os.path.exists(skip_marker):
+            os.remove(skip_marker)
+        return "written", source_size, variant_size
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def collect_images(root: str) -> List[str]:
+    """Original page images below ``root`` (a slug or chapter directory)."""
+    found: List[str] = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if os.path.splitext(name.lower())[1] in SOURCE_EXTS:
+                found.append(os.path.join(current, name))
+    return found
+
+
+def reencode_images(
+    paths: Iterable[str],
+    fmt: str = "webp",
+    quality: Optional[int] = None,
+    max_width: Optional[int] = None,
+    workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Re-encode ``paths`` across a process pool and summarize the savings.
+
+    ``bytes_before``/``bytes_after`` cover only the images that gained a
+    variant, so ``saved_bytes`` is what a client accepting ``fmt`` saves.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed; install it to enable image re-encoding.")
+    quality = config.REENCODE_QUALITY if quality is None else quality
+    max_width = config.REENCODE_MAX_WIDTH if max_width is None else max_width
+    workers = max(1, config.REENCODE_WORKERS if workers is None else workers)
+    paths = list(paths)
+    stats: Dict[str, Any] = {
+        "format": fmt,
+        "quality": quality,
+        "max_width": max_width or None,
+        "images": len(paths),
+        "variants_written": 0,
+        "variants_fresh": 0,
+        "kept_original": 0,
+        "errors": 0,
+        "bytes_before": 0,
+        "bytes_after": 0,
+        "saved_bytes": 0,
+    }
+    if not paths:
+        return stats
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = [pool.submit(encode_variant, path, fmt, quality, max_width) for path in paths]
+        for future in futures:
+            try:
+                status, source_size, variant_size = future.result()
+            except Exception:
+                stats["errors"] += 1
+                continue
+            if status in ("written", "fresh"):
+                stats["variants_written" if status == "written" else "variants_fresh"] += 1
+                stats["bytes_before"] += source_size
+                stats["bytes_after"] += variant_size or 0
+            else:
+                stats["kept_original"] += 1
+    stats["saved_bytes"] = stats["bytes_before"] - stats["bytes_after"]
+    return stats
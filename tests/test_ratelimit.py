@@ -0,0 +1,38 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from scraper import config, ratelimit
+
+
+URL = "http://example.test/chapter-1/"
+
+
+def _worker_budget():
+    limiter = ratelimit.get_rate_limiter()
+    state = limiter._state(limiter._host(URL))
+    return config.HOST_RATE_PER_SEC, state.rate, state.limit
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_workers_do_not_inherit_the_parent_budget(monkeypatch):
+    monkeypatch.setattr(config, "HOST_RATE_PER_SEC", 2.0)
+    monkeypatch.setattr(config, "HOST_BURST", 4)
+    monkeypatch.setattr(config, "HOST_MAX_CONCURRENCY", 4)
+    monkeypatch.setattr(ratelimit, "_LIMITER", None)
+
+    # The parent talks to the host first, as --series-url discovery does.
+    limiter = ratelimit.get_rate_limiter()
+    limiter.acquire(URL)
+    limiter.release(URL, 200, 0.01)
+
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=ratelimit.split_host_budget, initargs=(4,)) as pool:
+        config_rate, host_rate, host_limit = pool.submit(_worker_budget).result()
+
+    assert config_rate == 0.5
+    assert host_rate == 0.5
+    assert host_limit == 1.0
+    # The parent's own limiter keeps the full budget.
+    assert limiter._state(limiter._host(URL)).rate == 2.0